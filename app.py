@@ -7,15 +7,25 @@ Nutzt Anthropic Claude API (zuverlässig, Vincent hat bereits einen Key).
 
 import streamlit as st
 import anthropic
+import atexit
+import hashlib
+import httpx
 import os
 import json
+import orjson
 import re
 import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
+from types import MappingProxyType
 from dotenv import load_dotenv
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor, execute_values
 
 # Lade .env Datei (für API Key)
 load_dotenv()
@@ -26,15 +36,17 @@ BASE_PATH = Path(__file__).parent.parent.parent / "areas" / "aurelie-english"
 # Content-Pfad für JSON-Dateien (exercises, vocabulary, irregular_verbs)
 CONTENT_PATH = Path(__file__).parent / "content"
 
+# Verb in Klammern aus der Frage, z.B. "Yesterday, I ___ (go) to school." → "go"
+_VERB_RE = re.compile(r'\((\w+)\)')
+
 # --- Content Loading Functions ---
 @st.cache_data
 def load_exercises_json():
     """Lädt alle Übungen aus exercises.json."""
     path = CONTENT_PATH / "exercises.json"
     if path.exists():
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("exercises", {})
+        data = orjson.loads(path.read_bytes())
+        return data.get("exercises", {})
     return {}
 
 @st.cache_data
@@ -42,9 +54,8 @@ def load_vocabulary_json():
     """Lädt alle Vokabeln aus vocabulary.json."""
     path = CONTENT_PATH / "vocabulary.json"
     if path.exists():
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("vocabulary", {})  # JSON uses "vocabulary" not "units"
+        data = orjson.loads(path.read_bytes())
+        return data.get("vocabulary", {})  # JSON uses "vocabulary" not "units"
     return {}
 
 @st.cache_data
@@ -52,16 +63,17 @@ def load_irregular_verbs_json():
     """Lädt alle unregelmäßigen Verben aus irregular_verbs.json."""
     path = CONTENT_PATH / "irregular_verbs.json"
     if path.exists():
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("verbs", [])
+        data = orjson.loads(path.read_bytes())
+        return data.get("verbs", [])
     return []
 
+@st.cache_data
 def get_all_exercises_as_templates():
     """Konvertiert JSON-Übungen in das Template-Format für Kompatibilität.
 
     Returns:
-        list: [(question, verb, answer, hint, topic), ...]
+        list: [(question, verb, answer, hint, topic, answer_norm), ...]
+              answer_norm = answer.strip().lower() (einmal vorberechnet für check_answer)
     """
     exercises_data = load_exercises_json()
     templates = []
@@ -70,20 +82,50 @@ def get_all_exercises_as_templates():
         # JSON uses "items" not "exercises" for the exercise list
         items = topic_data.get("items", [])
         for ex in items:
-            # Format: (Satz mit Lücke, Verb-Infinitiv, richtige Antwort, Hint, Topic-Key)
+            # Format: (Satz mit Lücke, Verb-Infinitiv, richtige Antwort, Hint, Topic-Key, normalisierte Antwort)
+            answer = ex.get("answer", "")
             templates.append((
                 ex.get("question", ""),
                 ex.get("verb", ""),  # May be empty for regular verbs
-                ex.get("answer", ""),
+                answer,
                 ex.get("hint", ""),
-                topic_key
+                topic_key,
+                answer.strip().lower()
             ))
 
+    # Fallback auf minimale hardcoded Templates falls JSON nicht geladen werden kann
+    if not templates:
+        templates = [
+            ("Yesterday, I ___ (go) to school.", "go", "went", "go → went → gone", "simple_past_irregular", "went"),
+            ("I have ___ (go) to Paris twice.", "go", "gone", "Present Perfect: have/has + gone", "present_perfect", "gone"),
+        ]
+
     return templates
 
+@st.cache_data
+def build_template_indices():
+    """Baut Indizes über die Templates: Verb → Indizes und Topic-Key → Indizes.
+
+    Ersetzt lineare Filter-Durchläufe über alle Templates bei jeder Übung.
+
+    Returns:
+        tuple: ({verb: [idx, ...]}, {topic_key: [idx, ...]})
+    """
+    verb_to_templates = {}
+    topic_to_templates = {}
+    for idx, (question, verb, answer, hint, topic_key, answer_norm) in enumerate(get_all_exercises_as_templates()):
+        if verb:
+            verb_to_templates.setdefault(verb, []).append(idx)
+        topic_to_templates.setdefault(topic_key, []).append(idx)
+    return verb_to_templates, topic_to_templates
+
+@st.cache_resource
 def get_vocabulary_dict():
     """Erstellt ein flaches Dictionary aus allen Vokabeln für die Wort-Erklärung.
 
+    Gecacht per st.cache_resource: jeder Aufruf bekommt dasselbe dict (keine Kopie).
+    Read-only - niemals verändern!
+
     Returns:
         dict: {word: explanation, ...}
     """
@@ -134,18 +176,37 @@ def set_db_available(value):
     """Setzt den DB-Status."""
     st.session_state['_db_available'] = value
 
+def _close_pool_on_exit(pool):
+    """Schließt alle Verbindungen des Pools, wenn der Streamlit-Prozess endet.
+
+    Sonst bleiben die Verbindungen bei Supabase offen, bis sie dort auslaufen.
+    """
+    def close():
+        try:
+            pool.closeall()
+        except Exception:
+            pass  # Pool schon geschlossen
+
+    atexit.register(close)
+    return pool
+
 @st.cache_resource
-def get_db_connection():
-    """Erstellt eine persistente Datenbankverbindung.
+def get_db_pool():
+    """Erstellt einen persistenten Connection-Pool (1-10 Verbindungen).
+
+    Verbindungen werden pro Abfrage ausgeliehen und zurückgegeben - kein
+    Verbindungsaufbau (TCP + TLS + Auth) pro Abfrage, parallele Sessions
+    blockieren sich nicht gegenseitig.
 
-    GARANTIERT: Gibt niemals einen Fehler - entweder Connection oder None.
+    GARANTIERT: Gibt niemals einen Fehler - entweder Pool oder None.
     App läuft IMMER, auch ohne DB (dann ohne persistente Daten).
     """
     # Credentials NUR aus Streamlit Secrets oder Environment Variables
     # NIEMALS hardcoded!
     try:
         db_config = st.secrets["database"]
-        conn = psycopg2.connect(
+        return _close_pool_on_exit(psycopg2.pool.ThreadedConnectionPool(
+            1, 10,
             host=db_config["host"],
             port=db_config["port"],
             database=db_config["database"],
@@ -153,8 +214,7 @@ def get_db_connection():
             password=db_config["password"],
             sslmode='require',
             connect_timeout=5  # Timeout um hängende Connections zu vermeiden
-        )
-        return conn
+        ))
     except Exception:
         pass  # Streamlit secrets nicht verfügbar
 
@@ -163,7 +223,8 @@ def get_db_connection():
         host = os.environ.get("SUPABASE_HOST")
         password = os.environ.get("SUPABASE_PASSWORD")
         if host and password:
-            conn = psycopg2.connect(
+            return _close_pool_on_exit(psycopg2.pool.ThreadedConnectionPool(
+                1, 10,
                 host=host,
                 port=5432,
                 database='postgres',
@@ -171,63 +232,147 @@ def get_db_connection():
                 password=password,
                 sslmode='require',
                 connect_timeout=5
-            )
-            return conn
+            ))
     except Exception:
         pass  # Env vars nicht verfügbar oder Connection fehlgeschlagen
 
     # Keine DB-Verbindung möglich - App läuft trotzdem (ohne persistente Daten)
     return None
 
-def db_query(query, params=None, fetch=True):
-    """Führt eine Datenbankabfrage aus mit automatischer Reconnection.
+def _checkout_connection(pool):
+    """Leiht eine Verbindung aus dem Pool aus und ersetzt sie, falls sie geschlossen ist.
 
-    GARANTIERT: Gibt niemals einen Fehler - entweder Ergebnis oder None.
-    Alle Exceptions werden intern abgefangen.
+    Nach einem Netzwerk-Aussetzer kann der Pool tote Verbindungen enthalten -
+    die werden hier verworfen statt alle gecachten Ressourcen zu löschen.
+    """
+    conn = pool.getconn()
+    if conn.closed:
+        pool.putconn(conn, close=True)
+        conn = pool.getconn()
+    return conn
+
+@contextmanager
+def _pooled_cursor(cursor_factory=None):
+    """Leiht eine Verbindung aus dem Pool, liefert einen Cursor und gibt sie garantiert zurück.
+
+    Läuft der with-Block durch, wird committet. Bei einem Fehler wird zurückgerollt
+    (bzw. eine verlorene Verbindung geschlossen - der Pool ersetzt sie), die DB als
+    nicht verfügbar markiert und der Fehler weitergeworfen.
+    Ist keine Verbindung zu bekommen, ist der Cursor None.
+
+    Einzige Stelle mit der Logik zum Zurückgeben von Verbindungen -
+    db_query, db_execute_values und db_transaction bauen darauf auf.
     """
+    pool = get_db_pool()
     conn = None
-    try:
-        conn = get_db_connection()
-        if conn is None:
-            set_db_available(False)
-            return None  # DB nicht verfügbar
-
-        # Prüfe ob Verbindung noch aktiv ist
-        if conn.closed:
-            st.cache_resource.clear()
-            conn = get_db_connection()
-            if conn is None:
-                set_db_available(False)
-                return None
-
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params)
-            if fetch:
-                result = cur.fetchall()
-                conn.commit()
-                set_db_available(True)
-                return result
-            conn.commit()
-            set_db_available(True)
-            return None
-    except psycopg2.OperationalError:
-        # Verbindung verloren - Cache leeren
+    if pool is not None:
         try:
-            st.cache_resource.clear()
+            conn = _checkout_connection(pool)
         except Exception:
-            pass
+            conn = None
+
+    if conn is None:
         set_db_available(False)
-        return None
+        yield None  # DB nicht verfügbar
+        return
+
+    close = False
+    try:
+        with conn.cursor(cursor_factory=cursor_factory) as cur:
+            yield cur
+        conn.commit()
+        set_db_available(True)
+    except psycopg2.OperationalError:
+        # Verbindung verloren - kaputte Verbindung schließen, der Pool ersetzt sie
+        close = True
+        set_db_available(False)
+        raise
     except Exception:
         # Alle anderen Fehler
         try:
-            if conn and not conn.closed:
+            if not conn.closed:
                 conn.rollback()
         except Exception:
             pass
         set_db_available(False)
+        raise
+    finally:
+        try:
+            pool.putconn(conn, close=close or bool(conn.closed))
+        except Exception:
+            pass
+
+def db_query(query, params=None, fetch=True, cur=None):
+    """Führt eine Datenbankabfrage mit einer Verbindung aus dem Pool aus.
+
+    GARANTIERT: Gibt niemals einen Fehler - entweder Ergebnis oder None.
+    Alle Exceptions werden intern abgefangen.
+
+    Ausnahme: Mit cur (aus db_transaction) läuft die Abfrage in dieser Transaktion,
+    Fehler gehen an den Aufrufer - db_transaction rollt dann zurück und fängt sie ab.
+    """
+    if cur is not None:
+        cur.execute(query, params)
+        return cur.fetchall() if fetch else None
+
+    try:
+        with _pooled_cursor(RealDictCursor) as cur:
+            if cur is None:
+                return None  # DB nicht verfügbar
+            cur.execute(query, params)
+            result = cur.fetchall() if fetch else None
+        return result
+    except Exception:
         return None
 
+def db_execute_values(query, values, cur=None):
+    """Führt ein Multi-Row INSERT in EINEM Roundtrip aus (psycopg2 execute_values).
+
+    query muss genau einen "VALUES %s" Platzhalter enthalten.
+
+    GARANTIERT: Gibt niemals einen Fehler - True bei Erfolg, sonst False.
+    Ausnahme: Mit cur (aus db_transaction) wie bei db_query - Fehler gehen an den Aufrufer.
+    """
+    if not values:
+        return True  # Nichts zu schreiben
+
+    if cur is not None:
+        execute_values(cur, query, values)
+        return True
+
+    try:
+        with _pooled_cursor() as cur:
+            if cur is None:
+                return False  # DB nicht verfügbar
+            execute_values(cur, query, values)
+        return True
+    except Exception:
+        return False
+
+
+@contextmanager
+def db_transaction():
+    """Stellt einen Cursor für mehrere Schreibzugriffe in EINER Transaktion bereit.
+
+    Alle Statements im with-Block laufen über dieselbe Verbindung und werden
+    am Ende gemeinsam committet - bei einem Fehler wird alles zurückgerollt
+    (keine halb gespeicherte Session).
+
+        with db_transaction() as cur:
+            db_query(..., cur=cur)
+            db_execute_values(..., cur=cur)
+
+    GARANTIERT: Gibt niemals einen Fehler - ein Fehler im Block bricht ihn ab
+    und wird hier abgefangen (und geloggt). cur ist None wenn die DB nicht verfügbar ist
+    (die Funktionen nutzen dann wie gewohnt eigene Verbindungen). Ob committet wurde,
+    zeigt danach is_db_available().
+    """
+    try:
+        with _pooled_cursor(RealDictCursor) as cur:
+            yield cur
+    except Exception as e:
+        # Rollback ist schon passiert - nur melden, damit auch Programmierfehler auffallen
+        print(f"DB-Transaktion abgebrochen: {type(e).__name__}: {e}")
 
 def safe_db_operation(func):
     """Decorator der Datenbankfunktionen sicher macht.
@@ -241,6 +386,22 @@ def safe_db_operation(func):
             return None
     return wrapper
 
+# --- Claude API Client ---
+# Timeouts/Limits für die HTTP-Verbindungen zur Claude API
+_CLAUDE_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+_CLAUDE_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=10)
+
+@st.cache_resource
+def get_claude_client(api_key):
+    """Erstellt den Anthropic-Client einmal pro Prozess (pro API Key).
+
+    Wird über alle Reruns und Sessions wiederverwendet - kein neuer
+    Client und kein neuer TLS-Handshake bei jedem Klick. Eigener
+    httpx-Client mit HTTP/2 und Keep-Alive, damit Verbindungen offen bleiben.
+    """
+    http_client = httpx.Client(http2=True, timeout=_CLAUDE_HTTP_TIMEOUT, limits=_CLAUDE_HTTP_LIMITS)
+    return anthropic.Anthropic(api_key=api_key, http_client=http_client)
+
 # --- Page Config ---
 st.set_page_config(
     page_title="Aurelie's English Practice",
@@ -282,60 +443,110 @@ st.markdown("""
 
 # --- Helper Functions ---
 
+@st.cache_data
+def _read_text_cached(path, mtime):
+    """Liest eine Textdatei (mtime ist Teil des Cache-Keys - geänderte Dateien werden neu gelesen)."""
+    return Path(path).read_text()
+
+def _load_progress_file(name):
+    """Lädt eine Datei aus progress/ - nur ein stat pro Rerun, gelesen wird nur nach Änderungen."""
+    path = BASE_PATH / "progress" / name
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None  # Datei existiert nicht
+    return _read_text_cached(str(path), mtime)
+
 def load_lernstand():
     """Lädt den aktuellen Lernstand."""
-    path = BASE_PATH / "progress" / "lernstand.md"
-    if path.exists():
-        return path.read_text()
-    return None
+    return _load_progress_file("lernstand.md")
 
 def load_error_patterns():
     """Lädt die Fehlermuster."""
-    path = BASE_PATH / "progress" / "error-patterns.md"
-    if path.exists():
-        return path.read_text()
-    return None
+    return _load_progress_file("error-patterns.md")
+
+@st.cache_resource
+def _paths():
+    """Löst lokale Pfade einmal beim Start auf (ob sie existieren, wird bei Bedarf geprüft)."""
+    return {"sessions": BASE_PATH / "sessions"}
+
+@st.cache_data(ttl=60)
+def _count_sessions(mtime):
+    """Zählt die Session-Dateien (mtime des Ordners ist der Cache-Key).
+
+    Ein os.scandir-Durchlauf: Dateityp kommt aus dem Verzeichniseintrag, kein stat pro Datei.
+    """
+    try:
+        with os.scandir(_paths()["sessions"]) as entries:
+            return sum(1 for e in entries if e.name.endswith(".md") and e.is_file())
+    except OSError:
+        return 0  # Ordner inzwischen gelöscht
+
+def count_sessions():
+    """Anzahl der lokalen Session-Dateien - 0 wenn der Ordner (noch) nicht existiert.
 
-def get_exercise_from_claude(client, lernstand, error_patterns, exercise_num, total, active_error_patterns=None, selected_topic=None, due_items=None):
-    """Generiert eine Übung mit Claude API.
+    Der stat läuft bei jedem Aufruf, damit ein später angelegter oder
+    gelöschter Ordner sofort berücksichtigt wird.
+    """
+    try:
+        mtime = _paths()["sessions"].stat().st_mtime
+    except OSError:
+        return 0
+    return _count_sessions(mtime)
+
+# ===== TOPIC MAPPING für JSON-basierte Filterung =====
+# Konstanten auf Modulebene statt bei jedem Aufruf von get_exercise_from_claude neu gebaut.
+# WICHTIG: Reihenfolge matters! Spezifischere Matches ZUERST prüfen
+# Verwende exact match statt substring, um Doppel-Matching zu vermeiden
+_TOPIC_EXACT = MappingProxyType({
+    # Exact matches from dropdown (case-insensitive)
+    "simple past regular": ("simple_past_regular",),
+    "simple past irregular": ("simple_past_irregular",),
+    "present perfect": ("present_perfect",),
+    "past vs perfect": ("past_vs_perfect",),
+    "going-to future": ("going_to_future",),
+    "will future": ("will_future",),
+    "comparison": ("comparison_adjectives",),
+    "adverbs": ("adverbs",),
+})
+# Fallback substring matches (nur wenn kein exact match)
+_TOPIC_FALLBACK = MappingProxyType({
+    "past simple": ("simple_past_regular", "simple_past_irregular"),
+    "simple past": ("simple_past_regular", "simple_past_irregular"),
+    "going to future": ("going_to_future",),
+    "adjectives": ("comparison_adjectives",),
+    "irregular verbs": ("simple_past_irregular", "present_perfect"),
+    "irregular": ("simple_past_irregular", "present_perfect"),
+})
+# JSON topic key → menschenlesbares Topic für die Anzeige
+_TOPIC_DISPLAY_NAMES = MappingProxyType({
+    "simple_past_regular": "Past Simple - Regular Verbs",
+    "simple_past_irregular": "Past Simple - Irregular Verbs",
+    "present_perfect": "Present Perfect",
+    "past_vs_perfect": "Past vs Perfect (Signal Words)",
+    "going_to_future": "Going-to Future",
+    "will_future": "Will Future",
+    "comparison_adjectives": "Comparison of Adjectives",
+    "adverbs": "Adverbs",
+})
+# Umkehrung: Topic-Display-Name → JSON topic key (für fällige SR-Topics)
+_TOPIC_DISPLAY_TO_KEY = MappingProxyType({name: key for key, name in _TOPIC_DISPLAY_NAMES.items()})
+
+def select_exercise_template(exercise_num, active_error_patterns=None, selected_topic=None, due_items=None, rng=None):
+    """Wählt die Vorlage für eine Übung.
 
     Implementiert Interleaving: Mischt verschiedene Themen statt nur ein Thema zu wiederholen.
     Priorisiert: 1. Due Items (Spaced Repetition), 2. Selected Topic, 3. Aktive Fehlermuster, 4. Zufällig
-    """
 
-    # Lade Übungen aus JSON-Dateien (320 Übungen in 8 Topics)
-    sentence_templates = get_all_exercises_as_templates()
+    rng: random.Random der Session (st.session_state.rng) - ohne Angabe das globale random-Modul
 
-    # Fallback auf minimale hardcoded Templates falls JSON nicht geladen werden kann
-    if not sentence_templates:
-        sentence_templates = [
-            ("Yesterday, I ___ (go) to school.", "go", "went", "go → went → gone", "simple_past_irregular"),
-            ("I have ___ (go) to Paris twice.", "go", "gone", "Present Perfect: have/has + gone", "present_perfect"),
-        ]
+    Returns:
+        tuple: (question, verb, answer, hint, topic_key, answer_norm)
+    """
 
-    # ===== TOPIC MAPPING für JSON-basierte Filterung =====
-    # WICHTIG: Reihenfolge matters! Spezifischere Matches ZUERST prüfen
-    # Verwende exact match statt substring, um Doppel-Matching zu vermeiden
-    topic_to_json_keys_exact = {
-        # Exact matches from dropdown (case-insensitive)
-        "simple past regular": ["simple_past_regular"],
-        "simple past irregular": ["simple_past_irregular"],
-        "present perfect": ["present_perfect"],
-        "past vs perfect": ["past_vs_perfect"],
-        "going-to future": ["going_to_future"],
-        "will future": ["will_future"],
-        "comparison": ["comparison_adjectives"],
-        "adverbs": ["adverbs"],
-    }
-    # Fallback substring matches (nur wenn kein exact match)
-    topic_to_json_keys_fallback = {
-        "past simple": ["simple_past_regular", "simple_past_irregular"],
-        "simple past": ["simple_past_regular", "simple_past_irregular"],
-        "going to future": ["going_to_future"],
-        "adjectives": ["comparison_adjectives"],
-        "irregular verbs": ["simple_past_irregular", "present_perfect"],
-        "irregular": ["simple_past_irregular", "present_perfect"],
-    }
+    # Lade Übungen aus JSON-Dateien (320 Übungen in 8 Topics, sonst hardcoded Fallback)
+    sentence_templates = get_all_exercises_as_templates()
+    verb_to_templates, topic_to_templates = build_template_indices()
 
     # ===== THEMA-FILTERUNG + PRIORITÄT LOGIK =====
     # 1. Due Items (Spaced Repetition - HÖCHSTE PRIORITÄT)
@@ -346,58 +557,49 @@ def get_exercise_from_claude(client, lernstand, error_patterns, exercise_num, to
     filtered_templates = sentence_templates  # Default: alle
 
     # due_items ist jetzt ein dict: {"verbs": [...], "topics": [...], "all": [...]}
-    due_verbs = due_items.get("verbs", []) if isinstance(due_items, dict) else due_items or []
-    due_topics = due_items.get("topics", []) if isinstance(due_items, dict) else []
+    # Einmal in Sets umwandeln - keine doppelten Index-Lookups, O(1) Mitgliedschaft
+    due_verbs = set(due_items.get("verbs", []) if isinstance(due_items, dict) else due_items or [])
+    due_topics = set(due_items.get("topics", []) if isinstance(due_items, dict) else [])
+    pattern_verbs = set(active_error_patterns.get("problem_verbs") or []) if active_error_patterns else set()
 
     # HÖCHSTE PRIORITÄT: Spaced Repetition Due Items (jede 2. Übung wenn vorhanden)
     if (due_verbs or due_topics) and exercise_num % 2 == 0:
-        due_templates = []
+        due_idxs = set()
 
-        # 1. Filtere auf fällige Verben
+        # 1. Filtere auf fällige Verben (über den Verb-Index)
         if due_verbs:
-            due_templates.extend([t for t in sentence_templates if t[1] in due_verbs])
+            due_idxs.update(*(verb_to_templates[v] for v in due_verbs if v in verb_to_templates))
 
         # 2. Filtere auf fällige Topics (topic_key ist Index 4)
         if due_topics:
             # Konvertiere Topic-Display-Namen zu JSON-Keys
-            topic_display_to_key = {
-                "Past Simple - Irregular Verbs": "simple_past_irregular",
-                "Past Simple - Regular Verbs": "simple_past_regular",
-                "Present Perfect": "present_perfect",
-                "Past vs Perfect (Signal Words)": "past_vs_perfect",
-                "Going-to Future": "going_to_future",
-                "Will Future": "will_future",
-                "Comparison of Adjectives": "comparison_adjectives",
-                "Adverbs": "adverbs",
-            }
-            due_topic_keys = [topic_display_to_key.get(t, t.lower().replace(" ", "_")) for t in due_topics]
-            due_templates.extend([t for t in sentence_templates if t[4] in due_topic_keys])
+            due_topic_keys = {_TOPIC_DISPLAY_TO_KEY.get(t, t.lower().replace(" ", "_")) for t in due_topics}
+            due_idxs.update(*(topic_to_templates[k] for k in due_topic_keys if k in topic_to_templates))
 
-        if due_templates:
-            filtered_templates = due_templates
+        if due_idxs:
+            filtered_templates = [sentence_templates[i] for i in sorted(due_idxs)]
 
     # ZWEITE PRIORITÄT: Selected Topic (vom User-Dropdown)
     elif selected_topic:
         topic_lower = selected_topic.lower()
 
         # Finde passende JSON topic keys - EXACT MATCH FIRST
-        matching_keys = []
+        matching_keys = ()
 
         # 1. Versuche exact match (um "simple past regular" nicht mit "simple past" zu matchen)
-        if topic_lower in topic_to_json_keys_exact:
-            matching_keys = topic_to_json_keys_exact[topic_lower]
+        if topic_lower in _TOPIC_EXACT:
+            matching_keys = _TOPIC_EXACT[topic_lower]
         else:
             # 2. Fallback: substring match für generische Begriffe
-            for search_term, json_keys in topic_to_json_keys_fallback.items():
+            for search_term, json_keys in _TOPIC_FALLBACK.items():
                 if search_term in topic_lower:
-                    matching_keys.extend(json_keys)
+                    matching_keys = json_keys
                     break  # Nur ersten Match nehmen
 
         if matching_keys:
-            # Filtere auf passende Topics (topic_key ist jetzt Index 4)
-            # Dedupliziere matching_keys
-            matching_keys = list(set(matching_keys))
-            filtered_templates = [t for t in sentence_templates if t[4] in matching_keys]
+            # Filtere auf passende Topics (über den Topic-Index, dedupliziert)
+            topic_idxs = set().union(*(topic_to_templates.get(k, []) for k in matching_keys))
+            filtered_templates = [sentence_templates[i] for i in sorted(topic_idxs)]
 
         # Fallback: wenn keine Templates gefunden, alle nehmen
         if not filtered_templates:
@@ -406,42 +608,31 @@ def get_exercise_from_claude(client, lernstand, error_patterns, exercise_num, to
     # Priorisierung alle 3 Übungen: Fehlermuster einstreuen
     if exercise_num % 3 == 0 and not selected_topic:
         # Aktive Fehlermuster - MIT SPEZIFISCHEN PROBLEM-VERBEN
-        if active_error_patterns and active_error_patterns.get("problem_verbs"):
-            # Nutze nur die spezifischen Verben die Probleme verursacht haben
-            pattern_verbs = active_error_patterns["problem_verbs"]
-            if pattern_verbs:
-                # Filtere Templates auf genau diese Problem-Verben
-                filtered_templates = [t for t in sentence_templates if t[1] in pattern_verbs]
-                # Fallback: wenn keine Templates gefunden, alle nehmen
-                if not filtered_templates:
-                    filtered_templates = sentence_templates
+        # Nutze nur die spezifischen Verben die Probleme verursacht haben
+        if pattern_verbs:
+            # Filtere Templates auf genau diese Problem-Verben (über den Verb-Index)
+            pattern_idxs = set().union(*(verb_to_templates[v] for v in pattern_verbs if v in verb_to_templates))
+            filtered_templates = [sentence_templates[i] for i in sorted(pattern_idxs)]
+            # Fallback: wenn keine Templates gefunden, alle nehmen
+            if not filtered_templates:
+                filtered_templates = sentence_templates
 
     # Wähle eine zufällige Vorlage aus der (evtl. gefilterten) Liste
-    template = random.choice(filtered_templates)
-    question, verb, correct_answer, hint, topic_key = template
-
-    # Bestimme menschenlesbares Topic für die Anzeige
-    topic_display_names = {
-        "simple_past_regular": "Past Simple - Regular Verbs",
-        "simple_past_irregular": "Past Simple - Irregular Verbs",
-        "present_perfect": "Present Perfect",
-        "past_vs_perfect": "Past vs Perfect (Signal Words)",
-        "going_to_future": "Going-to Future",
-        "will_future": "Will Future",
-        "comparison_adjectives": "Comparison of Adjectives",
-        "adverbs": "Adverbs",
-    }
-    topic = topic_display_names.get(topic_key, topic_key.replace("_", " ").title())
+    return (rng or random).choice(filtered_templates)
 
-    prompt = f"""Du bist ein freundlicher Englisch-Lehrer für Aurelie, eine 12-jährige Schülerin (6. Klasse).
 
-Ich gebe dir einen fertigen Übungssatz. Erstelle NUR das JSON mit einer hilfreichen Erklärung.
+def _template_topic(topic_key):
+    """Bestimmt das menschenlesbare Topic für die Anzeige."""
+    return _TOPIC_DISPLAY_NAMES.get(topic_key, topic_key.replace("_", " ").title())
 
-ÜBUNGSSATZ: {question}
-VERB: {verb}
-RICHTIGE ANTWORT: {correct_answer}
-HINT: {hint}
-TOPIC: {topic}
+
+# Fester Teil des Übungs-Prompts - identisch bei jedem Call, deshalb als
+# cachebarer Block markiert (Anthropic Prompt Caching, ~5 Min TTL).
+# ACHTUNG: Claude 3 Haiku cacht erst ab 2048 Tokens Prefix (Tool + dieser Text) -
+# aktuell liegt der Prefix darunter, das Caching greift also (noch) nicht.
+_EXERCISE_PROMPT_PREFIX = """Du bist ein freundlicher Englisch-Lehrer für Aurelie, eine 12-jährige Schülerin (6. Klasse).
+
+Ich gebe dir einen fertigen Übungssatz (ÜBUNGSSATZ, VERB, RICHTIGE ANTWORT, HINT, TOPIC - steht unten). Gib die Übung mit einer hilfreichen Erklärung über das Tool return_exercise zurück.
 
 WICHTIG für die Erklärung - gib einen ECHTEN TRICK, nicht nur die Formen!:
 - SCHLECHT: "swim → swam → swum" (das ist kein Trick, nur auswendig lernen)
@@ -451,114 +642,224 @@ WICHTIG für die Erklärung - gib einen ECHTEN TRICK, nicht nur die Formen!:
 - Schreibe wie ein netter Lehrer, der mit einer 12-Jährigen spricht
 - Max 2 kurze Sätze, ein echter Merktrick!
 
-FORMAT (nur JSON, nichts anderes):
-{{
-    "topic": "{topic}",
-    "difficulty": 3,
-    "question": "{question}",
-    "correct_answer": "{correct_answer}",
-    "hint": "{hint}",
-    "explanation": "[Deine kinderfreundliche Erklärung - max 2 Sätze]"
-}}"""
+topic, question, correct_answer und hint genau wie unten angegeben übernehmen, difficulty ist 3."""
+
+# Strukturierte Ausgabe: Claude ruft dieses Tool auf, input ist direkt das Übungs-dict
+_EXERCISE_TOOL = {
+    "name": "return_exercise",
+    "description": "Gibt die fertige Übung mit kinderfreundlicher Erklärung zurück.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "topic": {"type": "string"},
+            "difficulty": {"type": "integer", "minimum": 1, "maximum": 5},
+            "question": {"type": "string"},
+            "correct_answer": {"type": "string"},
+            "hint": {"type": "string"},
+            "explanation": {"type": "string", "description": "Kinderfreundliche Erklärung mit echtem Merktrick - max 2 Sätze"}
+        },
+        "required": ["topic", "difficulty", "question", "correct_answer", "hint", "explanation"]
+    }
+}
+
+
+def _build_exercise_request(question, verb, correct_answer, hint, topic):
+    """Baut die Parameter für messages.create.
+
+    Der feste Prompt-Teil steht vorne und ist als cachebar markiert, nur der
+    kleine übungsspezifische Block ändert sich pro Call.
+    """
+    exercise_block = f"""ÜBUNGSSATZ: {question}
+VERB: {verb}
+RICHTIGE ANTWORT: {correct_answer}
+HINT: {hint}
+TOPIC: {topic}"""
+
+    return {
+        "model": "claude-3-haiku-20240307",
+        "max_tokens": 500,
+        "messages": [{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": _EXERCISE_PROMPT_PREFIX, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": exercise_block}
+            ]
+        }],
+        "tools": [_EXERCISE_TOOL],
+        "tool_choice": {"type": "tool", "name": "return_exercise"}
+    }
+
+
+def _parse_exercise_response(response):
+    """Liest die Übung aus dem tool_use Block der Claude-Antwort.
+
+    Wirft ValueError wenn die Antwort keinen tool_use Block enthält.
+    """
+    for block in response.content:
+        if block.type == "tool_use":
+            return dict(block.input)
+    raise ValueError("Antwort enthält keinen tool_use Block")
+
+
+def _with_answer_norm(exercise, correct_answer, answer_norm):
+    """Hängt die vorberechnete normalisierte Antwort an die Übung an.
+
+    Nur wenn die Übung die Antwort der Vorlage unverändert enthält - sonst
+    normalisiert der Lade-Block selbst.
+    """
+    if exercise.get("correct_answer") == correct_answer:
+        exercise["_correct_lc"] = answer_norm
+    return exercise
+
+
+def get_exercise_from_claude(client, lernstand, error_patterns, exercise_num, total, active_error_patterns=None, selected_topic=None, due_items=None, rng=None):
+    """Generiert eine Übung mit Claude API (Vorlage via select_exercise_template)."""
+    template = select_exercise_template(exercise_num, active_error_patterns, selected_topic, due_items, rng)
+    return _exercise_for_template(client, template)
+
+
+def _exercise_for_template(client, template):
+    """Holt die Übung zur Vorlage (gecacht) von Claude. Nutzt bei Fehlern die vorbereitete Übung.
+
+    Greift nicht auf st.session_state zu - läuft auch im Prefetch-Thread.
+    """
+    question, verb, correct_answer, hint, topic_key, answer_norm = template
+    topic = _template_topic(topic_key)
 
     try:
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        exercise = _call_claude_for_template(client, question, verb, correct_answer, hint, topic, _EXERCISE_REQUEST_VERSION)
     except anthropic.APIConnectionError:
         # Netzwerkfehler - nutze Fallback
-        return _get_fallback_exercise(question, correct_answer, hint, topic)
+        exercise = _get_fallback_exercise(question, correct_answer, hint, topic)
     except anthropic.RateLimitError:
         # Rate Limit - nutze Fallback
-        return _get_fallback_exercise(question, correct_answer, hint, topic)
+        exercise = _get_fallback_exercise(question, correct_answer, hint, topic)
     except anthropic.APIStatusError as e:
         # API Fehler - nutze Fallback
         print(f"API Status Error: {e.status_code}")
-        return _get_fallback_exercise(question, correct_answer, hint, topic)
+        exercise = _get_fallback_exercise(question, correct_answer, hint, topic)
+    except (ValueError, AttributeError) as e:
+        # Keine verwertbare Antwort - nutze die vorgefertigte Übung
+        print(f"Antwort-Fehler: {e}")
+        exercise = _get_fallback_exercise(question, correct_answer, hint, topic)
     except Exception as e:
         # Unerwarteter Fehler
         print(f"Unerwarteter API-Fehler: {e}")
-        return _get_fallback_exercise(question, correct_answer, hint, topic)
+        exercise = _get_fallback_exercise(question, correct_answer, hint, topic)
+    return _with_answer_norm(exercise, correct_answer, answer_norm)
 
-    try:
-        # Claude gibt Text in content[0].text zurück
-        text = response.content[0].text.strip()
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        return json.loads(text.strip())
-    except (json.JSONDecodeError, IndexError, AttributeError) as e:
-        # JSON Parsing Fehler - nutze die vorgefertigte Übung
-        print(f"JSON Parsing Fehler: {e}")
-        return _get_fallback_exercise(question, correct_answer, hint, topic)
 
+# Fingerabdruck von Modell, Prompt und Tool-Schema (Request mit leerer Vorlage) -
+# Teil des Cache-Keys von _call_claude_for_template: ändert sich der Prompt,
+# werden die auf Platte gespeicherten alten Erklärungen nicht mehr benutzt.
+_EXERCISE_REQUEST_VERSION = hashlib.sha256(orjson.dumps(_build_exercise_request("", "", "", "", ""))).hexdigest()[:16]
 
-def _get_fallback_exercise(question, correct_answer, hint, topic):
-    """Gibt die vorbereitete Übung zurück mit echten Merktricks."""
-    # ECHTE Eselsbrücken - keine langweiligen Formen, sondern Bilder und Geschichten!
-    verb_tricks = {
-        # GO
-        "went": "🦸 GO wird zu WENT - wie Clark Kent zu Superman! Gleiche Person, komplett anderes Aussehen. WENT hat nichts mit GO zu tun - einfach merken als 'Spezialfall'!",
-        "gone": "🐉 GONE reimt sich auf 'dragon' (Drache). Stell dir vor: Der Drache ist weg-ge-GONE! Bei 'have/has' immer GONE, nie went!",
 
-        # SWIM
-        "swam": "🏊 swIm → swAm → swUm: Die Vokale gehen I-A-U! Wie wenn du tauchst und Luftblasen machst: 'I...A...U!' SWAM = gestern geschwommen.",
-        "swum": "🏊 swIm → swAm → swUm: I-A-U! Bei 'have/has' immer SWUM: 'I have swum' = Ich bin geschwommen.",
+@st.cache_data(persist="disk", show_spinner=False)
+def _call_claude_for_template(_client, question, verb, correct_answer, hint, topic, request_version):
+    """Lässt Claude die Erklärung zur Vorlage schreiben.
+
+    Gecacht pro Vorlage und auf Platte gespeichert: dieselbe Vorlage geht nie
+    zweimal an Claude, auch nicht über Neustarts hinweg. _client ist vom
+    Cache-Key ausgenommen, request_version (_EXERCISE_REQUEST_VERSION) macht
+    Einträge eines geänderten Prompts ungültig. Wirft bei Fehlern, damit
+    Fallbacks nie gecacht werden.
+    (persist="disk" unterstützt kein ttl - die Einträge bleiben bis zum Löschen des Caches.)
+    """
+    response = _client.messages.create(**_build_exercise_request(question, verb, correct_answer, hint, topic))
+    return _parse_exercise_response(response)
+
 
-        # EAT
-        "ate": "🍪 ATE spricht man wie '8' (eight)! Merksatz: 'I ATE 8 cookies!' = Ich aß 8 Kekse! ATE = gestern gegessen.",
-        "eaten": "🍽️ Bei 'have/has' kommt EATEN (mit -en am Ende). EATEN klingt wie 'Essen' auf Deutsch! 'I have eaten' = Ich habe gegessen.",
+# --- Prefetching: nächste Übung im Hintergrund generieren ---
 
-        # RUN
-        "ran": "🏃 RUN → RAN: Wenn du rennst, geht dir die Puste aus: 'Raaaaan!' Das U wird zum A. RAN = gestern gerannt.",
-        "run": "🏃 Überraschung! Bei 'have/has' bleibt RUN gleich: 'I have run' = Ich bin gerannt. Kein neues Wort nötig!",
+@st.cache_resource
+def _get_prefetch_executor():
+    """Thread-Pool für das Prefetching (einmal pro Prozess).
+
+    Streamlit-Skripte laufen synchron - die Threads arbeiten daneben weiter, damit
+    Claude-Calls fertig werden, während Aurelie die aktuelle Übung löst.
+    max_workers begrenzt gleichzeitige Prefetch-Calls auf 3 (über alle Sessions).
+    """
+    return ThreadPoolExecutor(max_workers=3, thread_name_prefix="exercise-prefetch")
 
-        # TAKE
-        "took": "👀 TAKE → TOOK: Die zwei OO sehen aus wie große Augen! Du NIMMST etwas und guckst mit großen Augen: 'Oooh!' TOOK = gestern genommen.",
-        "taken": "✋ Bei 'have/has' kommt TAKEN: 'I have taken' = Ich habe genommen. Merke: -EN am Ende für Present Perfect!",
 
-        # WRITE
-        "wrote": "✍️ WRITE → WROTE: Das I wird zum O - wie ein Tintenklecks (Kreis) auf dem Papier! WROTE = gestern geschrieben.",
-        "written": "📝 Bei 'have/has' kommt WRITTEN (mit Doppel-T!): 'I have written' = Ich habe geschrieben.",
+def schedule_exercise_prefetch(client, exercise_num, active_error_patterns=None, selected_topic=None, due_items=None, rng=None):
+    """Startet die Generierung von Übung exercise_num im Hintergrund.
 
-        # SEE
-        "saw": "🪚 SEE → SAW: SAW ist auch 'Säge'! Merksatz: 'Ich SAH eine Säge!' SAW = gestern gesehen.",
-        "seen": "👁️ Bei 'have/has' bleibt das doppelte E: SEEN! 'I have seen' = Ich habe gesehen.",
+    Die Vorlage wird sofort (im Skript-Thread, mit dem rng der Session) gewählt,
+    nur der Claude-Call läuft im Thread - über denselben Cache wie get_exercise_from_claude.
 
-        # COME
-        "came": "🚪 COME → CAME: Nur O wird zu A! Super einfach. CAME = gestern gekommen.",
-        "come": "🏠 Überraschung! Bei 'have/has' bleibt COME gleich: 'I have come' = Ich bin gekommen.",
+    Returns:
+        concurrent.futures.Future: liefert das Übungs-dict
+    """
+    template = select_exercise_template(exercise_num, active_error_patterns, selected_topic, due_items, rng)
+    return _get_prefetch_executor().submit(_exercise_for_template, client, template)
 
-        # DO
-        "did": "✅ DO → DID: Kurz und einfach! DID für alles in der Vergangenheit. 'I did my homework' = Ich machte meine Hausaufgaben.",
-        "done": "🎯 Bei 'have/has' kommt DONE: 'I have done' = Ich habe gemacht. DONE = fertig, erledigt!",
 
-        # MAKE
-        "made": "🎨 MAKE → MADE: Das K fällt weg, E kommt dazu. Klingt fast gleich! MADE = gestern gemacht.",
+# ECHTE Eselsbrücken - keine langweiligen Formen, sondern Bilder und Geschichten!
+VERB_TRICKS = MappingProxyType({
+    # GO
+    "went": "🦸 GO wird zu WENT - wie Clark Kent zu Superman! Gleiche Person, komplett anderes Aussehen. WENT hat nichts mit GO zu tun - einfach merken als 'Spezialfall'!",
+    "gone": "🐉 GONE reimt sich auf 'dragon' (Drache). Stell dir vor: Der Drache ist weg-ge-GONE! Bei 'have/has' immer GONE, nie went!",
 
-        # BUY
-        "bought": "🛒 BUY → BOUGHT: Das sieht wild aus! Aber: 'brought' (bringen) und 'bought' (kaufen) reimen sich. BOUGHT = gestern gekauft.",
+    # SWIM
+    "swam": "🏊 swIm → swAm → swUm: Die Vokale gehen I-A-U! Wie wenn du tauchst und Luftblasen machst: 'I...A...U!' SWAM = gestern geschwommen.",
+    "swum": "🏊 swIm → swAm → swUm: I-A-U! Bei 'have/has' immer SWUM: 'I have swum' = Ich bin geschwommen.",
 
-        # FIND
-        "found": "🔍 FIND → FOUND: Das I wird zu OU. FOUND klingt wie 'Pfund' - du findest einen Schatz! FOUND = gestern gefunden.",
+    # EAT
+    "ate": "🍪 ATE spricht man wie '8' (eight)! Merksatz: 'I ATE 8 cookies!' = Ich aß 8 Kekse! ATE = gestern gegessen.",
+    "eaten": "🍽️ Bei 'have/has' kommt EATEN (mit -en am Ende). EATEN klingt wie 'Essen' auf Deutsch! 'I have eaten' = Ich habe gegessen.",
 
-        # GET
-        "got": "📦 GET → GOT: E wird zu O. Kurz und einfach! GOT = gestern bekommen.",
+    # RUN
+    "ran": "🏃 RUN → RAN: Wenn du rennst, geht dir die Puste aus: 'Raaaaan!' Das U wird zum A. RAN = gestern gerannt.",
+    "run": "🏃 Überraschung! Bei 'have/has' bleibt RUN gleich: 'I have run' = Ich bin gerannt. Kein neues Wort nötig!",
 
-        # GIVE
-        "given": "🎁 Bei 'have/has' kommt GIVEN: 'I have given' = Ich habe gegeben. GIVE + N = GIVEN!",
-        "gave": "🎁 GIVE → GAVE: I wird zu A. 'I gave you a gift' = Ich gab dir ein Geschenk. GAVE = gestern gegeben.",
+    # TAKE
+    "took": "👀 TAKE → TOOK: Die zwei OO sehen aus wie große Augen! Du NIMMST etwas und guckst mit großen Augen: 'Oooh!' TOOK = gestern genommen.",
+    "taken": "✋ Bei 'have/has' kommt TAKEN: 'I have taken' = Ich habe genommen. Merke: -EN am Ende für Present Perfect!",
 
-        # KNOW
-        "knew": "🧠 KNOW → KNEW: Das stumme K bleibt! KNEW reimt sich auf 'new' (neu). KNEW = wusste gestern.",
-        "known": "💡 Bei 'have/has' kommt KNOWN: 'I have known' = Ich habe gewusst. Das stumme K bleibt immer!",
-    }
+    # WRITE
+    "wrote": "✍️ WRITE → WROTE: Das I wird zum O - wie ein Tintenklecks (Kreis) auf dem Papier! WROTE = gestern geschrieben.",
+    "written": "📝 Bei 'have/has' kommt WRITTEN (mit Doppel-T!): 'I have written' = Ich habe geschrieben.",
 
+    # SEE
+    "saw": "🪚 SEE → SAW: SAW ist auch 'Säge'! Merksatz: 'Ich SAH eine Säge!' SAW = gestern gesehen.",
+    "seen": "👁️ Bei 'have/has' bleibt das doppelte E: SEEN! 'I have seen' = Ich habe gesehen.",
+
+    # COME
+    "came": "🚪 COME → CAME: Nur O wird zu A! Super einfach. CAME = gestern gekommen.",
+    "come": "🏠 Überraschung! Bei 'have/has' bleibt COME gleich: 'I have come' = Ich bin gekommen.",
+
+    # DO
+    "did": "✅ DO → DID: Kurz und einfach! DID für alles in der Vergangenheit. 'I did my homework' = Ich machte meine Hausaufgaben.",
+    "done": "🎯 Bei 'have/has' kommt DONE: 'I have done' = Ich habe gemacht. DONE = fertig, erledigt!",
+
+    # MAKE
+    "made": "🎨 MAKE → MADE: Das K fällt weg, E kommt dazu. Klingt fast gleich! MADE = gestern gemacht.",
+
+    # BUY
+    "bought": "🛒 BUY → BOUGHT: Das sieht wild aus! Aber: 'brought' (bringen) und 'bought' (kaufen) reimen sich. BOUGHT = gestern gekauft.",
+
+    # FIND
+    "found": "🔍 FIND → FOUND: Das I wird zu OU. FOUND klingt wie 'Pfund' - du findest einen Schatz! FOUND = gestern gefunden.",
+
+    # GET
+    "got": "📦 GET → GOT: E wird zu O. Kurz und einfach! GOT = gestern bekommen.",
+
+    # GIVE
+    "given": "🎁 Bei 'have/has' kommt GIVEN: 'I have given' = Ich habe gegeben. GIVE + N = GIVEN!",
+    "gave": "🎁 GIVE → GAVE: I wird zu A. 'I gave you a gift' = Ich gab dir ein Geschenk. GAVE = gestern gegeben.",
+
+    # KNOW
+    "knew": "🧠 KNOW → KNEW: Das stumme K bleibt! KNEW reimt sich auf 'new' (neu). KNEW = wusste gestern.",
+    "known": "💡 Bei 'have/has' kommt KNOWN: 'I have known' = Ich habe gewusst. Das stumme K bleibt immer!",
+})
+
+
+def _get_fallback_exercise(question, correct_answer, hint, topic):
+    """Gibt die vorbereitete Übung zurück mit echten Merktricks."""
     # Suche nach passendem Trick
-    explanation = verb_tricks.get(correct_answer.lower(), f"💡 Merke: {hint}")
+    explanation = VERB_TRICKS.get(correct_answer.lower(), f"💡 Merke: {hint}")
 
     return {
         "topic": topic,
@@ -569,13 +870,21 @@ def _get_fallback_exercise(question, correct_answer, hint, topic):
         "explanation": explanation
     }
 
-def check_answer(user_answer, correct_answer):
-    """Prüft die Antwort - exakt, keine Tippfehler-Toleranz bei Grammatikübungen."""
+def check_answer(user_answer, correct_answer, correct_norm=None):
+    """Prüft die Antwort - exakt, keine Tippfehler-Toleranz bei Grammatikübungen.
+
+    correct_norm: optional bereits normalisierte richtige Antwort (strip + lower),
+    damit sie nicht bei jedem Prüfen neu berechnet werden muss.
+    """
     if not user_answer or not correct_answer:
         return False
 
+    # Schneller Weg: exakt gleich geschrieben (häufigster Fall) - keine Normalisierung nötig
+    if user_answer == correct_answer:
+        return True
+
     user = user_answer.lower().strip()
-    correct = correct_answer.lower().strip()
+    correct = correct_norm if correct_norm is not None else correct_answer.lower().strip()
 
     if not user or not correct:
         return False
@@ -605,8 +914,17 @@ def explain_vocabulary(word, api_client=None):
     if api_client is None:
         return None
 
-    # Fallback: API-Call für unbekannte Wörter
-    prompt = f"""Was bedeutet "{word}" auf Deutsch?
+    # Fallback: API-Call für unbekannte Wörter (pro Wort gecacht)
+    try:
+        return _explain_vocabulary_via_api(word, api_client)
+    except Exception as e:
+        print(f"Vokabel-Erklärung Fehler: {e}")
+        return None
+
+
+def _vocabulary_prompt(word):
+    """Prompt für die kindgerechte Erklärung eines Wortes."""
+    return f"""Was bedeutet "{word}" auf Deutsch?
 
 WICHTIG - Antworte GENAU so:
 1. ZUERST die deutsche Übersetzung (ein Wort!)
@@ -621,24 +939,135 @@ BEISPIELE wie du antworten sollst:
 
 Antworte NUR mit: Übersetzung. Beispiel."""
 
+
+@st.cache_data(show_spinner=False)
+def _explain_vocabulary_via_api(word, _api_client):
+    """Fragt Claude nach einem unbekannten Wort.
+
+    Gecacht pro Wort, damit wiederholte Nachfragen keinen API-Call kosten.
+    Wirft bei Fehlern, damit Fehlschläge nicht gecacht werden.
+    """
+    prompt = _vocabulary_prompt(word)
+
+    # Streaming: abbrechen sobald die (einzeilige) Antwort fertig ist
+    text_parts = []
+    with _api_client.messages.stream(
+        model="claude-3-haiku-20240307",
+        max_tokens=80,
+        messages=[{"role": "user", "content": prompt}]
+    ) as stream:
+        for text in stream.text_stream:
+            text_parts.append(text)
+            # Alles nach dem ersten Zeilenumbruch wäre nur Geplauder
+            if "\n" in text and "".join(text_parts).strip():
+                break
+
+    answer = "".join(text_parts).strip().split("\n", 1)[0].strip()
+    if not answer:
+        raise ValueError(f"Leere Antwort für '{word}'")
+    return answer
+
+
+def batch_explain_vocabulary(words, api_client):
+    """Erklärt mehrere Wörter auf einmal.
+
+    Bekannte Wörter kommen sofort aus dem lokalen Dictionary. Alle unbekannten
+    gehen zusammen in EINEN Message Batch (ein API-Call, 50% günstiger) -
+    die Ergebnisse holt collect_vocabulary_batch() später ab.
+
+    Returns:
+        tuple: ({word: erklärung}, batch oder None)
+               erklärung ist None für Wörter, die nicht nachgeschlagen werden konnten
+               batch = {"id": batch_id, "words": {custom_id: word}}
+    """
+    local_vocab = get_vocabulary_dict()
+    explanations = {}
+    missing = []
+
+    for word in words:
+        word = word.strip()[:50].lower()
+        if not word or word in explanations or word in missing:
+            continue
+        if word in local_vocab:
+            explanations[word] = local_vocab[word]
+        else:
+            missing.append(word)
+
+    if not missing:
+        return explanations, None
+    if api_client is None:
+        return {**explanations, **dict.fromkeys(missing)}, None
+
+    # custom_id darf nur [a-zA-Z0-9_-] enthalten - deshalb Index statt Wort
+    custom_ids = {f"vocab-{i}": word for i, word in enumerate(missing)}
     try:
-        response = api_client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=150,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text.strip()
+        batch = api_client.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": "claude-3-haiku-20240307",
+                    "max_tokens": 80,
+                    "messages": [{"role": "user", "content": _vocabulary_prompt(word)}]
+                }
+            }
+            for custom_id, word in custom_ids.items()
+        ])
     except Exception as e:
-        print(f"Vokabel-Erklärung Fehler: {e}")
-        return None
+        print(f"Vokabel-Batch Fehler: {e}")
+        return {**explanations, **dict.fromkeys(missing)}, None
+
+    return explanations, {"id": batch.id, "words": custom_ids}
 
 
-def extract_from_school_material(image_bytes):
+def collect_vocabulary_batch(batch, api_client):
+    """Holt die Ergebnisse eines Vokabel-Batches ab.
+
+    Returns:
+        tuple: (status, {word: erklärung oder None})
+               status "pending" - Batch läuft noch
+               status "error"   - Abruf fehlgeschlagen, Batch bleibt offen (später nochmal versuchen)
+               status "done"    - fertig; None für Wörter ohne Ergebnis
+    """
+    try:
+        status = api_client.messages.batches.retrieve(batch["id"])
+        if status.processing_status != "ended":
+            return "pending", {}
+
+        explanations = dict.fromkeys(batch["words"].values())
+        for entry in api_client.messages.batches.results(batch["id"]):
+            word = batch["words"].get(entry.custom_id)
+            if word and entry.result.type == "succeeded":
+                text = entry.result.message.content[0].text.strip()
+                explanations[word] = text.split("\n", 1)[0].strip() or None
+        return "done", explanations
+    except Exception as e:
+        print(f"Vokabel-Batch Abruf Fehler: {e}")
+        return "error", {}
+
+
+def extract_from_school_material(image_bytes, api_client):
     """Extrahiert Vokabeln und Grammatik aus einem Foto von Schulmaterial."""
     import base64
+    import io
+    from PIL import Image, ImageOps
+
+    # Bild verkleinern: Claude nutzt max. 1568px Kantenlänge, alles darüber
+    # kostet nur Upload-Zeit und Tokens. Immer als JPEG senden (passt zum media_type).
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        # Handy-Fotos: Drehung steht nur im EXIF - beim Neu-Kodieren ginge sie verloren
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((1568, 1568))
+        if img.mode != "RGB":
+            img = img.convert("RGB")  # PNG mit Transparenz etc.
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=85)
+        image_bytes = buf.getvalue()
+    except Exception as e:
+        print(f"Bild-Verkleinerung Fehler (sende Original): {e}")
 
-    # Bild zu Base64 konvertieren
-    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+    # Bild zu Base64 konvertieren (Base64 ist reines ASCII)
+    image_base64 = base64.b64encode(image_bytes).decode("ascii")
 
     prompt = """Analysiere dieses Foto von Englisch-Schulmaterial.
 
@@ -667,7 +1096,7 @@ Was für Aufgaben sind das? (Lückentext, Übersetzen, etc.)
 Schreibe ALLES auf was du lesen kannst - auch wenn es unvollständig ist!"""
 
     try:
-        response = client.messages.create(
+        response = api_client.messages.create(
             model="claude-3-haiku-20240307",
             max_tokens=1000,
             messages=[{
@@ -722,11 +1151,17 @@ def save_extracted_vocabulary(extraction_text):
         return None
 
 
-def save_session_result(results):
+def save_session_result(results, cur=None, today=None):
     """Speichert die Session-Ergebnisse in Supabase.
 
     SICHER: Gibt None zurück wenn DB nicht verfügbar - App läuft weiter.
+    Mit cur (aus db_transaction) Teil dieser Transaktion - Fehler gehen dann an den Aufrufer.
+    today: Session-Datum (Standard: heute) - einmal pro Rerun berechnet und durchgereicht.
     """
+    if not results:
+        return None  # Leere Session - keine Verbindung öffnen
+
+    today = today or datetime.now().date()
     try:
         correct = sum(1 for r in results if r.get("correct", False))
         total = len(results)
@@ -744,12 +1179,47 @@ def save_session_result(results):
             VALUES (%s, %s, %s, %s, %s)
             RETURNING id
         """
-        result = db_query(query, (datetime.now().date(), total, correct, best_streak, json.dumps(details)), fetch=True)
+        result = db_query(query, (today, total, correct, best_streak, json.dumps(details)), fetch=True, cur=cur)
 
         if result:
-            return f"session-{result[0]['id']}"
+            session_id = result[0]['id']
+
+            # Einzelne Übungen zusätzlich als Zeilen speichern - alle in EINEM INSERT
+            # (details-JSON bleibt für Abwärtskompatibilität erhalten)
+            exercise_query = """INSERT INTO exercise_results
+                   (session_id, user_id, position, topic, question, user_answer, correct_answer, correct)
+                   VALUES %s"""
+            exercise_rows = [
+                (
+                    session_id,
+                    details["user_id"],
+                    position,
+                    r.get("topic", ""),
+                    r.get("question", ""),
+                    r.get("user_answer", ""),
+                    r.get("correct_answer", ""),
+                    r.get("correct", False)
+                )
+                for position, r in enumerate(results, 1)
+            ]
+            if cur is None:
+                db_execute_values(exercise_query, exercise_rows)
+            else:
+                # In der Transaktion hinter einem SAVEPOINT: fehlt z.B. die Tabelle
+                # (Migration 003), kostet das nur diese Zeilen, nicht die ganze Session
+                cur.execute("SAVEPOINT exercise_results")
+                try:
+                    db_execute_values(exercise_query, exercise_rows, cur=cur)
+                    cur.execute("RELEASE SAVEPOINT exercise_results")
+                except psycopg2.Error as e:
+                    print(f"exercise_results nicht gespeichert: {e}")
+                    cur.execute("ROLLBACK TO SAVEPOINT exercise_results")
+
+            return f"session-{session_id}"
     except Exception:
-        pass  # DB nicht verfügbar - kein Problem
+        if cur is not None:
+            raise  # Transaktion abbrechen (db_transaction rollt zurück)
+        # DB nicht verfügbar - kein Problem
     return None
 
 
@@ -775,47 +1245,63 @@ def save_feedback(exercise, user_answer, feedback_text):
     )
     return True
 
+# Fehlermuster-Klassifikation: einmal beim Import kompilierte Regexe statt String-Prädikate.
+# Regel = (Regex für user, Regex für correct, user muss das Verb sein, Vorlage) - None = egal.
+# Geprüft in Reihenfolge, erste passende Regel gewinnt. "{verb}" in der Beschreibung wird eingesetzt.
+_ENDS_ED_RE = re.compile(r'ed\Z')
+_NOT_ENDS_ED_RE = re.compile(r'(?<!ed)\Z')
+_PATTERN_CLASSIFIERS = (
+    # Pattern: Reguläre -ed Endung bei irregulären Verben (goed, swimmed, eated)
+    (_ENDS_ED_RE, _NOT_ENDS_ED_RE, False,
+     MappingProxyType({"pattern": "irregular-past-regularization",
+                       "description": "Reguläre -ed Endung bei '{verb}' benutzt"})),
+    # Pattern: Present Perfect Verwechslung (has went statt has gone)
+    (re.compile(r'went'), re.compile(r'gone'), False,
+     MappingProxyType({"pattern": "present-perfect-confusion",
+                       "description": "Past Simple Form im Present Perfect benutzt"})),
+    # Pattern: Tense Mixing (Grundform statt -ed Form)
+    (_NOT_ENDS_ED_RE, _ENDS_ED_RE, True,
+     MappingProxyType({"pattern": "tense-mixing",
+                       "description": "Grundform statt Past Simple benutzt"})),
+    # Allgemeiner Fehler
+    (None, None, False,
+     MappingProxyType({"pattern": "general-error",
+                       "description": "Falsches Verb für '{verb}'"})),
+)
+
+
 def detect_error_pattern(user_answer, correct_answer, verb):
-    """Erkennt das Fehlermuster basierend auf der falschen Antwort."""
+    """Erkennt das Fehlermuster basierend auf der falschen Antwort (erste passende Regel aus _PATTERN_CLASSIFIERS)."""
     # Edge Case: None oder leere Werte
     user = (user_answer or "").lower().strip()
     correct = (correct_answer or "").lower().strip()
     verb = verb or "unknown"
 
-    # Pattern: Reguläre -ed Endung bei irregulären Verben (goed, swimmed, eated)
-    if user.endswith("ed") and not correct.endswith("ed"):
-        return {
-            "pattern": "irregular-past-regularization",
-            "description": f"Reguläre -ed Endung bei '{verb}' benutzt",
-            "example": f"{user} statt {correct}",
-            "verb": verb
-        }
-
-    # Pattern: Present Perfect Verwechslung (has went statt has gone)
-    if "went" in user and "gone" in correct:
+    for user_rx, correct_rx, user_is_verb, template in _PATTERN_CLASSIFIERS:
+        if user_rx is not None and not user_rx.search(user):
+            continue
+        if correct_rx is not None and not correct_rx.search(correct):
+            continue
+        if user_is_verb and user != verb:
+            continue
         return {
-            "pattern": "present-perfect-confusion",
-            "description": "Past Simple Form im Present Perfect benutzt",
+            **template,
+            "description": template["description"].format(verb=verb),
             "example": f"{user} statt {correct}",
             "verb": verb
         }
 
-    # Pattern: Tense Mixing
-    if correct.endswith("ed") and not user.endswith("ed") and user == verb:
-        return {
-            "pattern": "tense-mixing",
-            "description": "Grundform statt Past Simple benutzt",
-            "example": f"{user} statt {correct}",
-            "verb": verb
-        }
 
-    # Allgemeiner Fehler
-    return {
-        "pattern": "general-error",
-        "description": f"Falsches Verb für '{verb}'",
-        "example": f"{user} statt {correct}",
-        "verb": verb
-    }
+# Signalwörter für Past Simple / Present Perfect - je eine kompilierte Alternation,
+# damit die Frage nur einmal durchsucht wird statt einmal pro Signalwort
+_PAST_SIMPLE_MARKERS = ("yesterday", "last week", "last month", "last year",
+                        "ago", "last monday", "last tuesday", "last wednesday",
+                        "last thursday", "last friday", "last saturday", "last sunday",
+                        "in 2023", "in 2022", "when i was")
+_PRESENT_PERFECT_MARKERS = ("already", "just", "ever", "never", "yet", "so far",
+                            "since", "for three", "for two", "recently", "lately")
+_PAST_SIMPLE_MARKER_RE = re.compile("|".join(map(re.escape, _PAST_SIMPLE_MARKERS)))
+_PRESENT_PERFECT_MARKER_RE = re.compile("|".join(map(re.escape, _PRESENT_PERFECT_MARKERS)))
 
 
 def explain_why_wrong(user_answer, correct_answer, question):
@@ -830,17 +1316,12 @@ def explain_why_wrong(user_answer, correct_answer, question):
     # === PAST SIMPLE vs PRESENT PERFECT ===
 
     # User schrieb Present Perfect (has/have + participle), aber Past Simple war gefragt
-    past_simple_markers = ["yesterday", "last week", "last month", "last year",
-                          "ago", "last monday", "last tuesday", "last wednesday",
-                          "last thursday", "last friday", "last saturday", "last sunday",
-                          "in 2023", "in 2022", "when i was"]
-
-    has_past_marker = any(marker in q_lower for marker in past_simple_markers)
+    past_marker_match = _PAST_SIMPLE_MARKER_RE.search(q_lower)
     user_is_present_perfect = user.startswith("has ") or user.startswith("have ") or "has " in user or "have " in user
 
-    if has_past_marker and user_is_present_perfect:
-        # Finde welcher Zeit-Marker in der Frage steht
-        found_marker = next((m for m in past_simple_markers if m in q_lower), "")
+    if past_marker_match and user_is_present_perfect:
+        # Welcher Zeit-Marker in der Frage steht
+        found_marker = past_marker_match.group(0)
         return f"""**Warum "{user}" hier falsch ist:**
 
 Du hast Present Perfect benutzt (has/have + Partizip).
@@ -853,14 +1334,11 @@ Aber in der Frage steht "**{found_marker}**" - das ist ein bestimmter Zeitpunkt
 ➡️ Bei "**{found_marker}**" brauchst du immer **Past Simple**!"""
 
     # User schrieb Past Simple, aber Present Perfect war gefragt
-    present_perfect_markers = ["already", "just", "ever", "never", "yet", "so far",
-                               "since", "for three", "for two", "recently", "lately"]
-
-    has_pp_marker = any(marker in q_lower for marker in present_perfect_markers)
+    pp_marker_match = _PRESENT_PERFECT_MARKER_RE.search(q_lower)
     user_is_past_simple = not user_is_present_perfect and correct.startswith("has ") or correct.startswith("have ")
 
-    if has_pp_marker and user_is_past_simple:
-        found_marker = next((m for m in present_perfect_markers if m in q_lower), "")
+    if pp_marker_match and user_is_past_simple:
+        found_marker = pp_marker_match.group(0)
         return f"""**Warum "{user}" hier falsch ist:**
 
 Du hast Past Simple benutzt.
@@ -877,7 +1355,7 @@ Aber in der Frage steht "**{found_marker}**" - das ist ein Signalwort für Prese
     # User hat -ed angehängt bei irregulären Verb
     if user.endswith("ed") and not correct.endswith("ed"):
         # Verb aus Klammern extrahieren
-        verb_match = re.search(r'\((\w+)\)', question)
+        verb_match = _VERB_RE.search(question)
         verb = verb_match.group(1) if verb_match else "dieses Verb"
         return f"""**Warum "{user}" hier falsch ist:**
 
@@ -894,7 +1372,7 @@ Sie haben eigene Formen die du auswendig lernen musst.
 
     # === GRUNDFORM STATT KONJUGIERTER FORM ===
 
-    verb_match = re.search(r'\((\w+)\)', question)
+    verb_match = _VERB_RE.search(question)
     verb = verb_match.group(1).lower() if verb_match else ""
 
     if user == verb and correct != verb:
@@ -935,142 +1413,242 @@ Schau auf die Zeitangaben in der Frage - sie zeigen dir welche Zeit gebraucht wi
     return None  # Nutze dann die normale Erklärung
 
 
-def update_error_patterns(results):
-    """Aktualisiert die error_patterns Tabelle in Supabase."""
-    # Falsche Antworten sammeln
-    errors = []
+# SM-2: Start-Ease-Factor neuer Items, Untergrenze, und ab welchem Intervall ein Item als gemeistert gilt
+_SM2_START_EASE = 2.5
+_SM2_MIN_EASE = 1.3
+_SR_MASTERED_DAYS = 60
+
+
+def _digest_results(results):
+    """Wertet die Session-Ergebnisse in EINEM Durchlauf aus.
+
+    Das Verb wird pro Ergebnis nur einmal extrahiert und von Ergebnis-Screen,
+    update_error_patterns und update_spaced_repetition gemeinsam genutzt.
+
+    Returns:
+        dict: {
+            "correct_count": 7,
+            "correct_examples": [{"answer": "went", "verb": "go"}, ...],
+            "wrong_examples": [{"user": "goed", "correct": "went", "verb": "go"}, ...],
+            "errors": [detect_error_pattern(...), ...],
+            "verb_correct": Counter({"go": 1, ...}),     # Verben (aus der Klammer)
+            "verb_wrong": Counter({"go": 1, ...}),
+            "topic_correct": Counter({"Simple Past": 2, ...}),
+            "topic_wrong": Counter({"Will Future": 1, ...})
+        }
+    """
+    digest = {
+        "correct_count": 0,
+        "correct_examples": [],
+        "wrong_examples": [],
+        "errors": [],
+        "verb_correct": Counter(),
+        "verb_wrong": Counter(),
+        "topic_correct": Counter(),
+        "topic_wrong": Counter(),
+    }
+
     for r in results:
-        if not r.get("correct", False):
-            question = r.get("question", "")
-            verb_match = re.search(r'\((\w+)\)', question)
-            verb = verb_match.group(1) if verb_match else "unknown"
+        # Verb aus der Frage extrahieren
+        verb_match = _VERB_RE.search(r.get("question", ""))
+        verb = verb_match.group(1) if verb_match else ""
+        correct = r.get("correct", False)
 
-            pattern = detect_error_pattern(
+        if correct:
+            digest["correct_count"] += 1
+            digest["correct_examples"].append({
+                "answer": r["correct_answer"],
+                "verb": verb
+            })
+        else:
+            digest["wrong_examples"].append({
+                "user": r["user_answer"],
+                "correct": r["correct_answer"],
+                "verb": verb
+            })
+            digest["errors"].append(detect_error_pattern(
                 r.get("user_answer", ""),
                 r.get("correct_answer", ""),
                 verb
-            )
-            errors.append(pattern)
+            ))
+
+        # Verben (aus der Klammer) und Topics für Spaced Repetition zählen
+        if verb:
+            digest["verb_correct" if correct else "verb_wrong"][verb] += 1
+        digest["topic_correct" if correct else "topic_wrong"][r.get("topic", "unknown")] += 1
+
+    return digest
+
+def update_error_patterns(digest, cur=None, today=None):
+    """Aktualisiert die error_patterns Tabelle in Supabase (digest aus _digest_results).
+
+    cur: optionaler Cursor aus db_transaction. today: Datum für last_seen (Standard: heute).
+    """
+    errors = digest["errors"]
 
     if not errors:
-        return
+        return  # Keine Fehler (oder leere Session) - keine Verbindung öffnen
 
-    today = datetime.now().date()
+    today = today or datetime.now().date()
 
-    for error in errors:
-        # Prüfen ob Pattern schon existiert
-        existing = db_query(
-            "SELECT id, occurrences FROM error_patterns WHERE pattern = %s AND verb = %s",
-            (error["pattern"], error["verb"])
-        )
+    # Gleiche Fehler dieser Session zusammenfassen: {(pattern, verb): Anzahl}
+    counts = Counter((e["pattern"], e["verb"]) for e in errors)
+    first_seen = {}
+    for e in errors:
+        first_seen.setdefault((e["pattern"], e["verb"]), e)
 
-        if existing:
-            # Vorkommen erhöhen
-            new_count = existing[0]['occurrences'] + 1
-            new_status = "AKTIV" if new_count >= 3 else "BEOBACHTEN"
-            db_query(
-                "UPDATE error_patterns SET occurrences = %s, status = %s, last_seen = %s WHERE id = %s",
-                (new_count, new_status, today, existing[0]['id']),
-                fetch=False
-            )
-        else:
-            # Neues Pattern einfügen
-            db_query(
-                """INSERT INTO error_patterns (pattern, description, example, verb, occurrences, status, last_seen)
-                   VALUES (%s, %s, %s, %s, 1, 'BEOBACHTEN', %s)""",
-                (error["pattern"], error["description"], error["example"], error["verb"], today),
-                fetch=False
-            )
+    rows = [
+        (pattern, first_seen[(pattern, verb)]["description"], first_seen[(pattern, verb)]["example"],
+         verb, count, "AKTIV" if count >= 3 else "BEOBACHTEN", today)
+        for (pattern, verb), count in counts.items()
+    ]
 
-def update_spaced_repetition(results):
-    """Aktualisiert die spaced_repetition Tabelle in Supabase.
+    # Alle Fehlermuster in EINEM Upsert schreiben - Vorkommen werden in der DB addiert
+    db_execute_values(
+        """INSERT INTO error_patterns (pattern, description, example, verb, occurrences, status, last_seen)
+           VALUES %s
+           ON CONFLICT (pattern, verb) DO UPDATE SET
+               occurrences = error_patterns.occurrences + EXCLUDED.occurrences,
+               status = CASE WHEN error_patterns.occurrences + EXCLUDED.occurrences >= 3
+                             THEN 'AKTIV' ELSE 'BEOBACHTEN' END,
+               last_seen = EXCLUDED.last_seen""",
+        rows,
+        cur=cur
+    )
+
+def update_spaced_repetition(digest, cur=None, today=None):
+    """Aktualisiert die spaced_repetition Tabelle in Supabase (digest aus _digest_results).
+
+    cur: optionaler Cursor aus db_transaction. today: Basis für next_review (Standard: heute).
 
     Trackt ZWEI Dinge:
     1. Verben (aus der Klammer) - für irreguläre Verben
     2. Topics (Will Future, Comparison, etc.) - für Grammatik-Themen
     """
-    # SM-2 Intervalle: 1 → 3 → 7 → 14 → 30 → 60 Tage
-    intervals = [1, 3, 7, 14, 30, 60]
+    verb_correct, verb_wrong = digest["verb_correct"], digest["verb_wrong"]
+    topic_correct, topic_wrong = digest["topic_correct"], digest["topic_wrong"]
 
     # === 1. VERBEN TRACKEN (wie bisher) ===
-    practiced_verbs = {}
-    for r in results:
-        verb_match = re.search(r'\((\w+)\)', r["question"])
-        if verb_match:
-            verb = verb_match.group(1)
-            if verb not in practiced_verbs:
-                practiced_verbs[verb] = {"correct": 0, "wrong": 0}
-            if r["correct"]:
-                practiced_verbs[verb]["correct"] += 1
-            else:
-                practiced_verbs[verb]["wrong"] += 1
-
-    for verb, stats in practiced_verbs.items():
-        _update_sr_item(verb, "Irregular Verbs", stats, intervals)
+    # Alle SR-Items dieser Session sammeln: {item: (topic, richtig, falsch)}
+    sr_items = {verb: ("Irregular Verbs", verb_correct[verb], verb_wrong[verb])
+                for verb in verb_correct.keys() | verb_wrong.keys()}
 
-    # === 2. TOPICS TRACKEN (NEU!) ===
-    # Gruppiere Ergebnisse nach Topic
-    practiced_topics = {}
-    for r in results:
-        topic = r.get("topic", "unknown")
-        # Normalisiere Topic-Namen für konsistentes Tracking
-        topic_key = f"topic:{topic}"  # Prefix um Verben/Topics zu unterscheiden
-
-        if topic_key not in practiced_topics:
-            practiced_topics[topic_key] = {"correct": 0, "wrong": 0, "display_name": topic}
-        if r["correct"]:
-            practiced_topics[topic_key]["correct"] += 1
-        else:
-            practiced_topics[topic_key]["wrong"] += 1
-
-    # NUR Topics mit Fehlern ins SR aufnehmen (nicht alle)
-    for topic_key, stats in practiced_topics.items():
-        if stats["wrong"] > 0:  # Nur wenn Fehler gemacht wurden
-            _update_sr_item(topic_key, stats["display_name"], stats, intervals)
+    # === 2. TOPICS TRACKEN ===
+    # NUR Topics mit Fehlern ins SR aufnehmen (nicht alle) - Prefix um Verben/Topics zu unterscheiden
+    for topic, wrong in topic_wrong.items():
+        sr_items[f"topic:{topic}"] = (topic, topic_correct[topic], wrong)
 
+    if not sr_items:
+        return  # Leere Session - keine Verbindung öffnen
 
-def _update_sr_item(item, topic, stats, intervals):
-    """Hilfsfunktion: Aktualisiert ein einzelnes SR-Item."""
     # User-Präfix für Isolation der Daten
     user_id = get_current_user()
-    prefixed_item = f"{user_id}:{item}" if user_id != "aurelie" else item
+    prefixed = {(f"{user_id}:{item}" if user_id != "aurelie" else item): value
+                for item, value in sr_items.items()}
 
+    # Aktuellen SM-2 Zustand aller Items in EINER Abfrage holen
     existing = db_query(
-        "SELECT id, interval_days FROM spaced_repetition WHERE item = %s",
-        (prefixed_item,)
+        "SELECT item, interval_days, ease_factor, reps FROM spaced_repetition WHERE item = ANY(%s)",
+        (list(prefixed),),
+        cur=cur
     )
+    if existing is None:
+        return  # DB nicht verfügbar - nichts schreiben
+    current_state = {
+        row['item']: (row['interval_days'], row['ease_factor'] or _SM2_START_EASE, row['reps'] or 0)
+        for row in existing
+    }
 
-    if existing:
-        current_interval = existing[0]['interval_days']
+    today = today or datetime.now().date()
+    rows = []
+    for item, (topic, correct, wrong) in prefixed.items():
+        # Neue Items starten mit Intervall 0, Start-Ease und 0 Wiederholungen
+        interval, ease, reps = current_state.get(item, (0, _SM2_START_EASE, 0))
+        next_interval, next_ease, next_reps, status = _compute_next_sr_state(interval, ease, reps, correct, wrong)
+        rows.append((item, topic, next_interval, next_ease, next_reps,
+                     today + timedelta(days=next_interval), status))
+
+    # Alle Items in EINEM Upsert schreiben (statt SELECT + UPDATE/INSERT pro Item)
+    db_execute_values(
+        """INSERT INTO spaced_repetition (item, topic, interval_days, ease_factor, reps, next_review, status)
+           VALUES %s
+           ON CONFLICT (item) DO UPDATE SET
+               interval_days = EXCLUDED.interval_days,
+               ease_factor = EXCLUDED.ease_factor,
+               reps = EXCLUDED.reps,
+               next_review = EXCLUDED.next_review,
+               status = EXCLUDED.status""",
+        rows,
+        cur=cur
+    )
 
-        # Bestimme nächstes Intervall
-        if stats["correct"] > stats["wrong"]:
-            try:
-                current_index = intervals.index(current_interval)
-                next_interval = intervals[min(current_index + 1, len(intervals) - 1)]
-            except ValueError:
-                next_interval = next((i for i in intervals if i > current_interval), 60)
-            status = "mastered" if next_interval >= 60 else "active"
-        else:
-            next_interval = 1
-            status = "active"
 
-        next_date = datetime.now().date() + timedelta(days=next_interval)
+def _compute_next_sr_state(current_interval, ease_factor, reps, correct, wrong):
+    """Berechnet den nächsten SM-2 Zustand eines SR-Items - reine Funktion ohne I/O.
 
-        db_query(
-            "UPDATE spaced_repetition SET interval_days = %s, next_review = %s, status = %s WHERE id = %s",
-            (next_interval, next_date, status, existing[0]['id']),
-            fetch=False
-        )
+    Die Session wird als eine Wiederholung mit Note q = round(5 * richtig / gesamt) gewertet:
+    - q >= 3: Intervall 1 → 6 → Intervall * Ease-Factor, reps + 1
+    - q < 3:  zurück auf 1 Tag, reps = 0
+    Ease-Factor: EF' = EF + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)), mindestens 1.3.
+    Das Datum (heute + Intervall) rechnet der Aufrufer.
+
+    Returns:
+        tuple: (next_interval, ease_factor, reps, status)
+    """
+    total = correct + wrong
+    q = round(5 * correct / total) if total else 0
+
+    if q >= 3:
+        if reps == 0:
+            next_interval = 1
+        elif reps == 1:
+            next_interval = 6
+        else:
+            next_interval = max(1, round(current_interval * ease_factor))
+        reps += 1
     else:
-        # Neues Item einfügen
-        next_date = datetime.now().date() + timedelta(days=1)
-        db_query(
-            """INSERT INTO spaced_repetition (item, topic, interval_days, next_review, status)
-               VALUES (%s, %s, 1, %s, 'active')""",
-            (prefixed_item, topic, next_date),
-            fetch=False
-        )
+        next_interval = 1
+        reps = 0
+
+    ease_factor = max(_SM2_MIN_EASE, round(ease_factor + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)), 2))
+    status = "mastered" if next_interval >= _SR_MASTERED_DAYS else "active"
+    return next_interval, ease_factor, reps, status
+
+def _summarize_active_patterns(rows):
+    """Fasst error_patterns-Zeilen (pattern, verb) zu {"pattern_names", "problem_verbs"} zusammen."""
+    if not rows:
+        return {"pattern_names": [], "problem_verbs": []}
+
+    pattern_names = list(set(r['pattern'] for r in rows))
+    problem_verbs = list(set(r['verb'] for r in rows if r['verb']))
+
+    return {"pattern_names": pattern_names, "problem_verbs": problem_verbs}
+
+def _summarize_due_items(rows, user_id):
+    """Teilt spaced_repetition-Zeilen (item, topic) in fällige Verben und Topics auf."""
+    if not rows:
+        return {"verbs": [], "topics": [], "all": []}
+
+    verbs = []
+    topics = []
+    all_items = []
+
+    for r in rows:
+        item = r['item']
+        # Entferne User-Präfix für Anzeige
+        display_item = item.split(":", 1)[-1] if ":" in item and not item.startswith("topic:") else item
+
+        all_items.append(display_item)
+
+        if item.startswith("topic:") or (user_id != "aurelie" and ":topic:" in item):
+            # Topic-Item: extrahiere den Topic-Namen
+            topic_name = item.replace("topic:", "").replace(f"{user_id}:topic:", "")
+            topics.append(topic_name)
+        else:
+            # Verb-Item
+            verbs.append(display_item)
+
+    return {"verbs": verbs, "topics": topics, "all": all_items}
 
 def get_active_error_patterns():
     """Holt aktive Fehlermuster aus Supabase für gezielte Übungen.
@@ -1080,18 +1658,11 @@ def get_active_error_patterns():
     """
     try:
         result = db_query("SELECT pattern, verb FROM error_patterns WHERE status = 'AKTIV'")
-
-        if not result:
-            return {"pattern_names": [], "problem_verbs": []}
-
-        pattern_names = list(set(r['pattern'] for r in result))
-        problem_verbs = list(set(r['verb'] for r in result if r['verb']))
-
-        return {"pattern_names": pattern_names, "problem_verbs": problem_verbs}
+        return _summarize_active_patterns(result)
     except Exception:
         return {"pattern_names": [], "problem_verbs": []}
 
-def get_due_items():
+def get_due_items(today=None):
     """Holt heute fällige Spaced Repetition Items aus Supabase.
 
     Returns:
@@ -1102,14 +1673,14 @@ def get_due_items():
         }
     """
     try:
-        today = datetime.now().date()
+        today = today or datetime.now().date()
         user_id = get_current_user()
 
         # Filtere nach User-Präfix oder unpräfixierte Items (für Aurelie-Kompatibilität)
         if user_id == "aurelie":
-            # Aurelie: alle Items ohne Präfix
+            # Aurelie: alle Items ohne Präfix (%% = literales % wegen Parametern)
             result = db_query(
-                "SELECT item, topic FROM spaced_repetition WHERE status = 'active' AND next_review <= %s AND item NOT LIKE '%:%'",
+                "SELECT item, topic FROM spaced_repetition WHERE status = 'active' AND next_review <= %s AND item NOT LIKE '%%:%%'",
                 (today,)
             )
         else:
@@ -1120,31 +1691,58 @@ def get_due_items():
                 (today, prefix)
             )
 
-        if not result:
-            return {"verbs": [], "topics": [], "all": []}
+        return _summarize_due_items(result, user_id)
+    except Exception:
+        return {"verbs": [], "topics": [], "all": []}
+
+def get_start_dashboard(today=None):
+    """Holt aktive Fehlermuster und fällige Items in EINEM Roundtrip.
 
-        verbs = []
-        topics = []
-        all_items = []
+    Nutzt die SQL-Funktion get_start_dashboard (Migration 006). Fehlt sie oder
+    schlägt der Aufruf fehl, werden die Einzelabfragen genutzt.
 
-        for r in result:
-            item = r['item']
-            # Entferne User-Präfix für Anzeige
-            display_item = item.split(":", 1)[-1] if ":" in item and not item.startswith("topic:") else item
+    Returns:
+        tuple: (active_patterns, due_items) - wie get_active_error_patterns / get_due_items
+    """
+    today = today or datetime.now().date()
+    user_id = get_current_user()
+    result = db_query(
+        "SELECT get_start_dashboard(%s, %s) AS dashboard",
+        (today, user_id)
+    )
+    if result and result[0]['dashboard'] is not None:
+        dashboard = result[0]['dashboard']
+        return (
+            _summarize_active_patterns(dashboard.get("active_patterns")),
+            _summarize_due_items(dashboard.get("due_items"), user_id),
+        )
 
-            all_items.append(display_item)
+    # Fallback: Einzelabfragen
+    return get_active_error_patterns(), get_due_items(today)
 
-            if item.startswith("topic:") or (user_id != "aurelie" and ":topic:" in item):
-                # Topic-Item: extrahiere den Topic-Namen
-                topic_name = item.replace("topic:", "").replace(f"{user_id}:topic:", "")
-                topics.append(topic_name)
-            else:
-                # Verb-Item
-                verbs.append(display_item)
 
-        return {"verbs": verbs, "topics": topics, "all": all_items}
-    except Exception:
-        return {"verbs": [], "topics": [], "all": []}
+def get_practice_data():
+    """Aktive Fehlermuster und fällige Items, pro Streamlit-Session gecacht.
+
+    Spart die DB-Abfragen bei jedem Rerun (jeder Klick). Der Cache gilt für den
+    aktuellen User und wird nach update_error_patterns / update_spaced_repetition
+    mit invalidate_practice_data() verworfen. Ohne DB wird nichts gecacht.
+
+    Returns:
+        tuple: (active_patterns, due_items)
+    """
+    user_id = get_current_user()
+    cached = st.session_state.get("practice_data")
+    if cached is None or cached["user"] != user_id:
+        active_patterns, due_items = get_start_dashboard()
+        cached = {"user": user_id, "active_patterns": active_patterns, "due_items": due_items}
+        if st.session_state.get('_db_available', True):
+            st.session_state.practice_data = cached
+    return cached["active_patterns"], cached["due_items"]
+
+def invalidate_practice_data():
+    """Verwirft die gecachten Fehlermuster / fälligen Items (nach Schreibzugriffen)."""
+    st.session_state.pop("practice_data", None)
 
 
 # --- Engagement System Functions ---
@@ -1154,13 +1752,62 @@ def get_current_user():
     return st.session_state.get('current_user', 'aurelie')
 
 
+# Dashboard-Daten werden per st.cache_resource gecacht (Rückgabe per Referenz,
+# keine Kopie pro Rerun). WICHTIG: Die zurückgegebenen Objekte sind read-only -
+# niemals .append() o.ä. darauf, sonst ändert sich der Cache für alle Reruns!
+# Nach Schreibzugriffen clear_dashboard_cache() aufrufen.
+
+@st.cache_resource(ttl=300)
+def _load_user_stats(user_id):
+    """Lädt die user_stats Zeile (gecacht). Wirft bei DB-Fehler, damit nichts gecacht wird."""
+    result = db_query("SELECT * FROM user_stats WHERE user_id = %s", (user_id,))
+    if result is None:
+        raise RuntimeError("Datenbank nicht verfügbar")
+    return result[0] if result else None
+
+
+@st.cache_resource(ttl=300)
+def _load_topic_mastery(user_id):
+    """Lädt die topic_mastery Zeilen (gecacht). Wirft bei DB-Fehler, damit nichts gecacht wird."""
+    result = db_query(
+        """SELECT topic_key, total_attempts, correct_attempts, mastery_level
+           FROM topic_mastery WHERE user_id = %s ORDER BY topic_key""",
+        (user_id,)
+    )
+    if result is None:
+        raise RuntimeError("Datenbank nicht verfügbar")
+    return result
+
+
+@st.cache_resource(ttl=300)
+def _load_unlocked_achievements(user_id):
+    """Lädt die freigeschalteten Achievements (gecacht). Wirft bei DB-Fehler, damit nichts gecacht wird."""
+    result = db_query(
+        "SELECT achievement_key, unlocked_at FROM achievements WHERE user_id = %s ORDER BY unlocked_at DESC",
+        (user_id,)
+    )
+    if result is None:
+        raise RuntimeError("Datenbank nicht verfügbar")
+    return result
+
+
+def clear_dashboard_cache():
+    """Leert die gecachten Dashboard-Daten (nach Schreibzugriffen aufrufen)."""
+    _load_user_stats.clear()
+    _load_topic_mastery.clear()
+    _load_unlocked_achievements.clear()
+
+
 def get_user_stats():
-    """Holt die User-Statistiken (Streak, XP, Level)."""
+    """Holt die User-Statistiken (Streak, XP, Level).
+
+    Read-only: das Ergebnis kommt aus dem Cache und darf nicht verändert werden.
+    """
     user_id = get_current_user()
     try:
-        result = db_query("SELECT * FROM user_stats WHERE user_id = %s", (user_id,))
-        if result:
-            return result[0]
+        stats = _load_user_stats(user_id)
+        if stats:
+            return stats
         # Fallback: Create default entry
         db_query(
             "INSERT INTO user_stats (user_id) VALUES (%s) ON CONFLICT (user_id) DO NOTHING",
@@ -1181,10 +1828,10 @@ def get_user_stats():
     }
 
 
-def update_daily_streak():
-    """Aktualisiert den täglichen Streak basierend auf dem Übungsdatum."""
+def update_daily_streak(today=None):
+    """Aktualisiert den täglichen Streak basierend auf dem Übungsdatum (Standard: heute)."""
     try:
-        today = datetime.now().date()
+        today = today or datetime.now().date()
         yesterday = today - timedelta(days=1)
 
         stats = get_user_stats()
@@ -1372,10 +2019,7 @@ def check_and_unlock_achievements(stats, session_results=None):
 def get_unlocked_achievements():
     """Holt alle freigeschalteten Achievements."""
     try:
-        result = db_query(
-            "SELECT achievement_key, unlocked_at FROM achievements WHERE user_id = %s ORDER BY unlocked_at DESC",
-            (get_current_user(),)
-        )
+        result = _load_unlocked_achievements(get_current_user())
     except Exception:
         return []  # Table doesn't exist yet
 
@@ -1410,8 +2054,11 @@ def get_unlocked_achievements():
     return achievements
 
 
-def update_topic_mastery(results):
+def update_topic_mastery(results, today=None):
     """Aktualisiert die Meisterschaft pro Grammatik-Thema."""
+    if not results:
+        return  # Leere Session - keine Verbindung öffnen
+
     try:
         # Gruppiere Ergebnisse nach Topic
         topic_stats = {}
@@ -1427,7 +2074,7 @@ def update_topic_mastery(results):
             if r.get('correct', False):
                 topic_stats[topic_key]['correct'] += 1
 
-        today = datetime.now().date()
+        today = today or datetime.now().date()
 
         user_id = get_current_user()
         for topic_key, stats in topic_stats.items():
@@ -1475,11 +2122,7 @@ def update_topic_mastery(results):
 def get_topic_mastery():
     """Holt den Fortschritt pro Thema."""
     try:
-        result = db_query(
-            """SELECT topic_key, total_attempts, correct_attempts, mastery_level
-               FROM topic_mastery WHERE user_id = %s ORDER BY topic_key""",
-            (get_current_user(),)
-        )
+        result = _load_topic_mastery(get_current_user())
     except Exception:
         return []  # Table doesn't exist yet
 
@@ -1536,6 +2179,11 @@ if "session_started" not in st.session_state:
     st.session_state.session_started = False
 if "best_streak" not in st.session_state:
     st.session_state.best_streak = 0
+if "prefetched" not in st.session_state:
+    st.session_state.prefetched = {}  # {exercise_num: Future} - im Hintergrund generierte Übungen
+if "rng" not in st.session_state:
+    # Eigener Zufallsgenerator pro Session - kein geteilter globaler Zustand zwischen Sessions
+    st.session_state.rng = random.Random(int(time.time()))
 
 # --- Main App ---
 
@@ -1550,8 +2198,8 @@ if not api_key:
     if not api_key:
         st.stop()
 
-# Claude Client initialisieren
-client = anthropic.Anthropic(api_key=api_key)
+# Claude Clients holen (gecacht, werden nur einmal erstellt)
+client = get_claude_client(api_key)
 
 # --- Start Screen ---
 if not st.session_state.session_started:
@@ -1619,31 +2267,19 @@ if not st.session_state.session_started:
             practicing = [t for t in mastery_data if t['mastery_level'] == 'PRACTICING']
             learning = [t for t in mastery_data if t['mastery_level'] == 'LEARNING']
 
-            col1, col2, col3 = st.columns(3)
-
-            with col1:
-                st.markdown("**✅ Gemeistert**")
-                if mastered:
-                    for t in mastered:
-                        st.markdown(f"- {t['display_name']} ({t['accuracy']:.0f}%)")
-                else:
-                    st.caption("_Noch keins_")
-
-            with col2:
-                st.markdown("**📝 Am Üben**")
-                if practicing:
-                    for t in practicing:
-                        st.markdown(f"- {t['display_name']} ({t['accuracy']:.0f}%)")
-                else:
-                    st.caption("_Noch keins_")
-
-            with col3:
-                st.markdown("**🌱 Am Lernen**")
-                if learning:
-                    for t in learning:
-                        st.markdown(f"- {t['display_name']} ({t['accuracy']:.0f}%)")
-                else:
-                    st.caption("_Noch keins_")
+            mastery_columns = zip(
+                st.columns(3),
+                ["✅ Gemeistert", "📝 Am Üben", "🌱 Am Lernen"],
+                [mastered, practicing, learning]
+            )
+            for col, header, items in mastery_columns:
+                with col:
+                    st.markdown(f"**{header}**")
+                    if items:
+                        # Eine Markdown-Liste statt ein st.markdown pro Thema
+                        st.markdown("\n".join(f"- {t['display_name']} ({t['accuracy']:.0f}%)" for t in items))
+                    else:
+                        st.caption("_Noch keins_")
 
             st.markdown("---")
 
@@ -1661,19 +2297,16 @@ if not st.session_state.session_started:
         st.info("📊 Engagement-System wird geladen... (Datenbank wird eingerichtet)")
 
         # Lade letzte Sessions für Kontext (alter Code als Fallback)
-        sessions_path = BASE_PATH / "sessions"
-        if sessions_path.exists():
-            session_count = len(list(sessions_path.glob("*.md")))
-            if session_count > 0:
-                st.success(f"💪 Du hast schon **{session_count} Sessions** gemacht! Weiter so!")
+        session_count = count_sessions()
+        if session_count > 0:
+            st.success(f"💪 Du hast schon **{session_count} Sessions** gemacht! Weiter so!")
 
     # Lernstand laden
     lernstand = load_lernstand()
     error_patterns_content = load_error_patterns()
 
     # Aktive Fehlermuster und fällige Items holen
-    active_patterns = get_active_error_patterns()
-    due_items = get_due_items()
+    active_patterns, due_items = get_practice_data()
 
     # Spaced Repetition: Fällige Items anzeigen
     if due_items.get("verbs") or due_items.get("topics"):
@@ -1778,6 +2411,7 @@ elif st.session_state.exercise_num <= st.session_state.total_exercises:
             st.session_state.results = []
             st.session_state.streak = 0
             st.session_state.current_exercise = None
+            st.session_state.prefetched = {}
             st.session_state.show_feedback = False
             st.session_state.selected_topic = None
             st.rerun()
@@ -1787,40 +2421,76 @@ elif st.session_state.exercise_num <= st.session_state.total_exercises:
     st.progress(progress)
     st.caption(f"Übung {st.session_state.exercise_num} von {st.session_state.total_exercises}")
 
-    # Streak anzeigen
-    if st.session_state.streak > 0:
-        st.markdown(f'<p class="streak">🔥 {st.session_state.streak} richtig hintereinander!</p>', unsafe_allow_html=True)
+    # Streak anzeigen - fester Platzhalter, nur befüllt wenn es einen Streak gibt
+    streak_slot = st.empty()
+    streak = st.session_state.streak
+    if streak > 0:
+        streak_slot.markdown(f'<p class="streak">🔥 {streak} richtig hintereinander!</p>', unsafe_allow_html=True)
+    else:
+        streak_slot.empty()
 
     # Übung laden oder generieren
     if st.session_state.current_exercise is None:
         with st.spinner("Übung wird geladen..."):
-            lernstand = load_lernstand()
-            error_patterns = load_error_patterns()
-            # Aktive Fehlermuster für Interleaving holen
-            active_patterns = get_active_error_patterns()
-            # Fällige Spaced Repetition Items holen
-            due_items = get_due_items()
-            exercise = get_exercise_from_claude(
-                client,
-                lernstand,
-                error_patterns,
-                st.session_state.exercise_num,
-                st.session_state.total_exercises,
-                active_error_patterns=active_patterns,
-                selected_topic=st.session_state.get("selected_topic"),
-                due_items=due_items
-            )
+            exercise_num = st.session_state.exercise_num
+            # Aktive Fehlermuster für Interleaving + fällige Spaced Repetition Items (pro Session gecacht)
+            active_patterns, due_items = get_practice_data()
+
+            # Im Hintergrund vorbereitete Übung nutzen (falls vorhanden)
+            exercise = None
+            prefetched = st.session_state.prefetched.pop(exercise_num, None)
+            if prefetched is not None:
+                try:
+                    exercise = prefetched.result(timeout=30)
+                except Exception as e:
+                    print(f"Prefetch nicht nutzbar: {e}")
+
+            if exercise is None:
+                exercise = get_exercise_from_claude(
+                    client,
+                    load_lernstand(),
+                    load_error_patterns(),
+                    exercise_num,
+                    st.session_state.total_exercises,
+                    active_error_patterns=active_patterns,
+                    selected_topic=st.session_state.get("selected_topic"),
+                    due_items=due_items,
+                    rng=st.session_state.rng
+                )
+
+            # Nächste Übung schon mal im Hintergrund generieren lassen
+            next_num = exercise_num + 1
+            if next_num <= st.session_state.total_exercises and next_num not in st.session_state.prefetched:
+                st.session_state.prefetched[next_num] = schedule_exercise_prefetch(
+                    client,
+                    next_num,
+                    active_error_patterns=active_patterns,
+                    selected_topic=st.session_state.get("selected_topic"),
+                    due_items=due_items,
+                    rng=st.session_state.rng
+                )
+
+            # Richtige Antwort einmalig normalisieren, falls nicht schon aus der Vorlage vorhanden
+            if "_correct_lc" not in exercise:
+                exercise["_correct_lc"] = exercise["correct_answer"].strip().lower()
             st.session_state.current_exercise = exercise
             st.rerun()
 
     exercise = st.session_state.current_exercise
 
+    # Häufig gelesene Werte einmal holen statt bei jeder Verwendung
+    question = exercise['question']
+    correct_answer = exercise['correct_answer']
+    diff = exercise.get('difficulty', 3)
+    # Safety: letzte Antwort aus results holen (falls vorhanden)
+    last_answer = st.session_state.results[-1]['user_answer'] if st.session_state.results else ""
+
     # Übung anzeigen
     st.markdown(f"**Thema**: {exercise['topic']}")
-    st.markdown("⭐" * exercise.get('difficulty', 3) + "☆" * (5 - exercise.get('difficulty', 3)))
+    st.markdown("⭐" * diff + "☆" * (5 - diff))
 
     st.markdown('<div class="exercise-box">', unsafe_allow_html=True)
-    st.markdown(f"### {exercise['question']}")
+    st.markdown(f"### {question}")
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Vokabel-Hilfe: Wort erklären lassen
@@ -1828,45 +2498,83 @@ elif st.session_state.exercise_num <= st.session_state.total_exercises:
         vocab_word = st.text_input(
             "Welches Wort verstehst du nicht?",
             key=f"vocab_help_{st.session_state.exercise_num}",
-            placeholder="z.B. 'went' oder 'swimming'"
+            placeholder="z.B. 'went' oder 'swimming' (mehrere mit Komma trennen)"
         )
         if st.button("Erklären", key=f"explain_btn_{st.session_state.exercise_num}"):
-            if vocab_word and vocab_word.strip():
+            # Leere Einträge (z.B. nur Kommas) zählen nicht als Wort
+            words = [w.strip() for w in (vocab_word or "").split(",") if w.strip()]
+            if len(words) > 1:
+                # Mehrere Wörter: bekannte sofort, unbekannte gesammelt als Batch
+                explanations, batch = batch_explain_vocabulary(words, api_client=client)
+                for word, explanation in explanations.items():
+                    if explanation:
+                        st.info(f"**{word}**: {explanation}")
+                    else:
+                        st.warning(f"**{word}**: Das konnte ich leider nicht erklären. Frag Papa!")
+                if batch:
+                    # Anhängen statt überschreiben - ein noch offener Batch bleibt erhalten
+                    st.session_state.setdefault("vocab_batches", []).append(batch)
+            elif words:
                 with st.spinner("Moment..."):
-                    explanation = explain_vocabulary(vocab_word.strip(), api_client=client)
+                    explanation = explain_vocabulary(words[0], api_client=client)
                     if explanation:
-                        st.info(f"**{vocab_word.strip()}**: {explanation}")
+                        st.info(f"**{words[0]}**: {explanation}")
                     else:
                         st.warning("Das konnte ich leider nicht erklären. Frag Papa!")
             else:
                 st.warning("Tippe erst ein Wort ein!")
 
+        # Offene Vokabel-Batches: Ergebnisse abholen sobald fertig
+        if st.session_state.get("vocab_batches"):
+            pending_words = ", ".join(
+                word for batch in st.session_state.vocab_batches for word in batch["words"].values()
+            )
+            st.caption(f"⏳ Wird nachgeschlagen: {pending_words}")
+            if st.button("🔄 Nachschauen", key=f"collect_batch_{st.session_state.exercise_num}"):
+                still_pending = []
+                any_pending = any_error = False
+                for batch in st.session_state.vocab_batches:
+                    batch_status, batch_results = collect_vocabulary_batch(batch, client)
+                    if batch_status in ("pending", "error"):
+                        # Batch bleibt offen - die Wörter gehen nicht verloren
+                        still_pending.append(batch)
+                        any_pending = any_pending or batch_status == "pending"
+                        any_error = any_error or batch_status == "error"
+                        continue
+                    for word, explanation in batch_results.items():
+                        if explanation:
+                            st.info(f"**{word}**: {explanation}")
+                        else:
+                            st.warning(f"**{word}**: Das konnte ich leider nicht erklären. Frag Papa!")
+                st.session_state.vocab_batches = still_pending
+                if any_error:
+                    st.warning("Nachschauen hat gerade nicht geklappt - probier es gleich nochmal!")
+                elif any_pending:
+                    st.caption("Noch nicht fertig - schau gleich nochmal!")
+
     # Feedback anzeigen wenn vorhanden
     if st.session_state.show_feedback:
         if st.session_state.last_correct:
             st.markdown(f"""
 <div class="correct">
 <h4>✅ Richtig!</h4>
-<p><strong>{exercise['correct_answer']}</strong> ist korrekt!</p>
+<p><strong>{correct_answer}</strong> ist korrekt!</p>
 <p>💡 {exercise.get('hint', '')}</p>
 </div>
 """, unsafe_allow_html=True)
         else:
-            # Safety: letzte Antwort aus results holen (falls vorhanden)
-            last_answer = st.session_state.results[-1]['user_answer'] if st.session_state.results else "?"
-
             # Kontextbezogene Erklärung WARUM die Antwort falsch ist
             why_wrong = explain_why_wrong(
-                last_answer,
-                exercise['correct_answer'],
-                exercise['question']
+                last_answer or "?",
+                correct_answer,
+                question
             )
 
             st.markdown(f"""
 <div class="incorrect">
 <h4>🤔 Fast!</h4>
-<p>Du hast geschrieben: <em>{last_answer}</em></p>
-<p>Richtig wäre: <strong>{exercise['correct_answer']}</strong></p>
+<p>Du hast geschrieben: <em>{last_answer or "?"}</em></p>
+<p>Richtig wäre: <strong>{correct_answer}</strong></p>
 </div>
 """, unsafe_allow_html=True)
 
@@ -1881,9 +2589,6 @@ elif st.session_state.exercise_num <= st.session_state.total_exercises:
 
         # Feedback-Option für die Übung
         with st.expander("📝 Feedback zu dieser Übung geben"):
-            # Letzte Antwort für Kontext holen
-            last_user_answer = st.session_state.results[-1]['user_answer'] if st.session_state.results else ""
-
             feedback_text = st.text_area(
                 "Was war das Problem?",
                 key=f"feedback_text_{st.session_state.exercise_num}",
@@ -1892,7 +2597,7 @@ elif st.session_state.exercise_num <= st.session_state.total_exercises:
             if st.button("💬 Feedback senden", key=f"send_feedback_{st.session_state.exercise_num}"):
                 if feedback_text and feedback_text.strip():
                     # Feedback in Supabase speichern
-                    if save_feedback(exercise, last_user_answer, feedback_text):
+                    if save_feedback(exercise, last_answer, feedback_text):
                         st.success("✅ Danke!")
                     else:
                         st.error("Feedback konnte nicht gespeichert werden.")
@@ -1921,14 +2626,14 @@ elif st.session_state.exercise_num <= st.session_state.total_exercises:
         # Form wurde submitted (Button ODER Enter-Taste)
         if submitted:
             if user_answer:
-                is_correct = check_answer(user_answer, exercise['correct_answer'])
+                is_correct = check_answer(user_answer, correct_answer, exercise.get('_correct_lc'))
 
                 # Ergebnis speichern
                 st.session_state.results.append({
                     "topic": exercise['topic'],
-                    "question": exercise['question'],
+                    "question": question,
                     "user_answer": user_answer,
-                    "correct_answer": exercise['correct_answer'],
+                    "correct_answer": correct_answer,
                     "correct": is_correct
                 })
 
@@ -1955,46 +2660,69 @@ else:
     st.balloons()
 
     results = st.session_state.results
-    correct = sum(1 for r in results if r["correct"])
+    digest = _digest_results(results)  # Ein Durchlauf für Zähler, Beispiele und DB-Updates
+    correct = digest["correct_count"]
     total = len(results)
     quote = int(correct / total * 100) if total > 0 else 0
     best_streak = st.session_state.get("best_streak", 0)
 
     # AUTO-SAVE: Session automatisch speichern wenn noch nicht geschehen
     if not st.session_state.get("session_saved", False) and results:
-        session_id = save_session_result(results)
-        update_error_patterns(results)
-        update_spaced_repetition(results)
+        today = datetime.now().date()  # Einmal berechnet - alle Schreibzugriffe nutzen dasselbe Datum
+
+        # Alle drei Schreibzugriffe in EINER Transaktion - ganz oder gar nicht
+        session_id = None
+        with db_transaction() as cur:
+            new_session_id = save_session_result(results, cur, today)
+            update_error_patterns(digest, cur, today)
+            update_spaced_repetition(digest, cur, today)
+            session_id = new_session_id  # Nur wenn alle drei durchgelaufen sind
+        if cur is not None and not is_db_available():
+            session_id = None  # Commit fehlgeschlagen - nichts gespeichert
+        invalidate_practice_data()
+
+        # Ergebnis merken - die Meldung unten erscheint auch bei späteren Reruns
+        st.session_state.session_save_ok = session_id is not None
 
         # === ENGAGEMENT SYSTEM ===
-        try:
-            # 1. Streak aktualisieren
-            new_streak = update_daily_streak()
-            st.session_state.updated_streak = new_streak
-
-            # 2. XP berechnen und vergeben
-            total_xp, xp_breakdown = calculate_session_xp(results, best_streak)
-            for xp_type in ['correct_answer', 'streak_bonus', 'perfect_session']:
-                # Vereinfacht: alles als session_xp
-                pass
-            award_xp(total_xp, 'session', session_id)
-            st.session_state.earned_xp = total_xp
-            st.session_state.xp_breakdown = xp_breakdown
-
-            # 3. Topic Mastery aktualisieren
-            update_topic_mastery(results)
-
-            # 4. Achievements prüfen
-            stats = get_user_stats()
-            new_achievements = check_and_unlock_achievements(stats, results)
-            st.session_state.new_achievements = new_achievements
-
-        except Exception as e:
-            # Engagement-System Fehler sollten Session nicht blockieren
-            print(f"Engagement-System Fehler: {e}")
+        if session_id is None:
+            # Session nicht gespeichert - dann auch keine XP / Streak vergeben
+            st.session_state.updated_streak = 0
             st.session_state.earned_xp = 0
             st.session_state.xp_breakdown = []
             st.session_state.new_achievements = []
+        else:
+            try:
+                # 1. Streak aktualisieren
+                new_streak = update_daily_streak(today)
+                st.session_state.updated_streak = new_streak
+
+                # 2. XP berechnen und vergeben
+                total_xp, xp_breakdown = calculate_session_xp(results, best_streak)
+                # Vereinfacht: alle XP-Arten werden als ein 'session' Eintrag vergeben
+                award_xp(total_xp, 'session', session_id)
+                st.session_state.earned_xp = total_xp
+                st.session_state.xp_breakdown = xp_breakdown
+
+                # 3. Topic Mastery aktualisieren
+                update_topic_mastery(results, today)
+
+                # Gecachte Dashboard-Daten sind jetzt veraltet
+                clear_dashboard_cache()
+
+                # 4. Achievements prüfen
+                stats = get_user_stats()
+                new_achievements = check_and_unlock_achievements(stats, results)
+                st.session_state.new_achievements = new_achievements
+                if new_achievements:
+                    _load_unlocked_achievements.clear()
+
+            except Exception as e:
+                # Engagement-System Fehler sollten Session nicht blockieren
+                print(f"Engagement-System Fehler: {e}")
+                st.session_state.earned_xp = 0
+                st.session_state.xp_breakdown = []
+                st.session_state.new_achievements = []
 
         st.session_state.session_saved = True
 
@@ -2052,26 +2780,9 @@ else:
 
     st.markdown("---")
 
-    # Konkrete Beispiele sammeln (nicht nur Themen-Zähler)
-    correct_examples = []  # Liste von {"answer": "went", "verb": "go"}
-    wrong_examples = []    # Liste von {"user": "goed", "correct": "went", "verb": "go"}
-
-    for r in results:
-        # Verb aus der Frage extrahieren
-        verb_match = re.search(r'\((\w+)\)', r.get("question", ""))
-        verb = verb_match.group(1) if verb_match else ""
-
-        if r["correct"]:
-            correct_examples.append({
-                "answer": r["correct_answer"],
-                "verb": verb
-            })
-        else:
-            wrong_examples.append({
-                "user": r["user_answer"],
-                "correct": r["correct_answer"],
-                "verb": verb
-            })
+    # Konkrete Beispiele (nicht nur Themen-Zähler) - schon in _digest_results gesammelt
+    correct_examples = digest["correct_examples"]  # Liste von {"answer": "went", "verb": "go"}
+    wrong_examples = digest["wrong_examples"]      # Liste von {"user": "goed", "correct": "went", "verb": "go"}
 
     col1, col2 = st.columns(2)
 
@@ -2130,14 +2841,20 @@ else:
 
     st.markdown("---")
 
-    # Auto-Save Bestätigung anzeigen
-    st.success("✅ Deine Session wurde automatisch gespeichert!")
+    # Auto-Save Ergebnis anzeigen
+    if st.session_state.get("session_save_ok", False):
+        st.success("✅ Deine Session wurde automatisch gespeichert!")
+    else:
+        st.warning("⚠️ Die Session konnte nicht gespeichert werden - XP und Streak gibt es diesmal leider nicht.")
 
     # Button für neue Session
     if st.button("🔄 Neue Session starten", type="primary", use_container_width=True):
         st.session_state.exercise_num = 0
         st.session_state.session_saved = False  # Reset für nächste Session
+        st.session_state.pop("session_save_ok", None)
+        st.session_state.pop("updated_streak", None)
         st.session_state.current_exercise = None
+        st.session_state.prefetched = {}
         st.session_state.results = []
         st.session_state.streak = 0
         st.session_state.best_streak = 0
@@ -2166,7 +2883,11 @@ with st.sidebar:
             st.session_state.best_streak = 0
             st.session_state.exercise_num = 0
             st.session_state.current_exercise = None
-            st.cache_data.clear()
+            st.session_state.prefetched = {}
+            # Nur die user-bezogenen Caches leeren - die auf Platte gespeicherten
+            # Claude-Erklärungen und das Vokabel-Cache gelten für alle User
+            clear_dashboard_cache()
+            invalidate_practice_data()
             st.rerun()
 
         st.warning("🧪 **TEST-MODUS**")
@@ -2203,13 +2924,24 @@ with st.sidebar:
             st.image(uploaded_file, caption=f"Bild {i+1}: {uploaded_file.name}", use_container_width=True)
 
         if st.button("🔍 Alles extrahieren", key="extract_vocab_btn"):
-            all_extractions = []
-            for i, file in enumerate(uploaded_files):
-                with st.spinner(f"Analysiere Bild {i+1} von {len(uploaded_files)}..."):
-                    image_bytes = file.getvalue()
-                    extraction = extract_from_school_material(image_bytes)
-                    if extraction:
-                        all_extractions.append(f"### Bild {i+1}: {file.name}\n\n{extraction}")
+            # Alle Bilder gleichzeitig an Claude schicken - Gesamtzeit ≈ ein einzelner Aufruf
+            extractions = [None] * len(uploaded_files)  # Ergebnisse in Upload-Reihenfolge
+            progress = st.progress(0.0, text=f"Analysiere {len(uploaded_files)} Bild(er)...")
+            with ThreadPoolExecutor(max_workers=min(8, len(uploaded_files))) as executor:
+                futures = {
+                    executor.submit(extract_from_school_material, file.getvalue(), client): i
+                    for i, file in enumerate(uploaded_files)
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    extractions[futures[future]] = future.result()
+                    progress.progress(done / len(uploaded_files), text=f"{done} von {len(uploaded_files)} Bildern analysiert")
+            progress.empty()
+
+            all_extractions = [
+                f"### Bild {i+1}: {file.name}\n\n{extraction}"
+                for i, (file, extraction) in enumerate(zip(uploaded_files, extractions))
+                if extraction
+            ]
 
             if all_extractions:
                 combined = "\n\n---\n\n".join(all_extractions)
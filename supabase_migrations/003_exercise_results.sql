@@ -0,0 +1,21 @@
+-- Exercise Results Table for Aurelie English App
+-- Run this in Supabase SQL Editor
+
+-- Eine Zeile pro beantworteter Übung (wird pro Session in EINEM INSERT geschrieben).
+-- session_results.details (JSON) bleibt für Abwärtskompatibilität erhalten.
+CREATE TABLE IF NOT EXISTS exercise_results (
+    id SERIAL PRIMARY KEY,
+    session_id INTEGER REFERENCES session_results(id) ON DELETE CASCADE,
+    user_id TEXT DEFAULT 'aurelie',
+    position INTEGER NOT NULL,  -- Reihenfolge innerhalb der Session (1, 2, 3, ...)
+    topic TEXT,
+    question TEXT,
+    user_answer TEXT,
+    correct_answer TEXT,
+    correct BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Create indexes for performance
+CREATE INDEX IF NOT EXISTS idx_exercise_results_session ON exercise_results(session_id);
+CREATE INDEX IF NOT EXISTS idx_exercise_results_user_topic ON exercise_results(user_id, topic);
@@ -0,0 +1,12 @@
+-- Unique Item for Spaced Repetition (Aurelie English App)
+-- Run this in Supabase SQL Editor
+
+-- update_spaced_repetition schreibt alle Items einer Session in EINEM Upsert
+-- (INSERT ... ON CONFLICT (item) DO UPDATE) - das braucht einen Unique-Index auf item.
+
+-- Evtl. vorhandene Duplikate entfernen (neueste Zeile pro Item behalten)
+DELETE FROM spaced_repetition a
+USING spaced_repetition b
+WHERE a.item = b.item AND a.id < b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_spaced_repetition_item_unique ON spaced_repetition(item);
@@ -0,0 +1,25 @@
+-- Unique (pattern, verb) for Error Patterns (Aurelie English App)
+-- Run this in Supabase SQL Editor
+
+-- update_error_patterns schreibt alle Fehler einer Session in EINEM Upsert
+-- (INSERT ... ON CONFLICT (pattern, verb) DO UPDATE) - das braucht einen Unique-Index.
+
+-- Evtl. vorhandene Duplikate zusammenführen: Vorkommen in der neuesten Zeile summieren ...
+UPDATE error_patterns e
+SET occurrences = d.total,
+    status = CASE WHEN d.total >= 3 THEN 'AKTIV' ELSE e.status END,
+    last_seen = d.last_seen
+FROM (
+    SELECT pattern, verb, MAX(id) AS keep_id, SUM(occurrences) AS total, MAX(last_seen) AS last_seen
+    FROM error_patterns
+    GROUP BY pattern, verb
+    HAVING COUNT(*) > 1
+) d
+WHERE e.id = d.keep_id;
+
+-- ... und die älteren Zeilen löschen
+DELETE FROM error_patterns a
+USING error_patterns b
+WHERE a.pattern = b.pattern AND a.verb = b.verb AND a.id < b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_error_patterns_pattern_verb_unique ON error_patterns(pattern, verb);
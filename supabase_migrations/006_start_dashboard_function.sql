@@ -0,0 +1,29 @@
+-- Start Dashboard Function for Aurelie English App
+-- Run this in Supabase SQL Editor
+
+-- Liefert alles, was der Startscreen aus der DB braucht, in EINEM Roundtrip:
+--   active_patterns: [{"pattern": ..., "verb": ...}, ...]  (error_patterns mit Status AKTIV)
+--   due_items:       [{"item": ..., "topic": ...}, ...]    (heute fällige SR-Items des Users)
+-- Aufruf aus der App: SELECT get_start_dashboard(today, user_id)
+CREATE OR REPLACE FUNCTION get_start_dashboard(p_today DATE, p_user_id TEXT)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'active_patterns', COALESCE(
+            (SELECT jsonb_agg(jsonb_build_object('pattern', pattern, 'verb', verb))
+             FROM error_patterns
+             WHERE status = 'AKTIV'),
+            '[]'::jsonb),
+        'due_items', COALESCE(
+            (SELECT jsonb_agg(jsonb_build_object('item', item, 'topic', topic))
+             FROM spaced_repetition
+             WHERE status = 'active'
+               AND next_review <= p_today
+               -- Aurelie: Items ohne Präfix, andere User: nur Items mit ihrem Präfix
+               AND CASE WHEN p_user_id = 'aurelie' THEN item NOT LIKE '%:%'
+                        ELSE item LIKE p_user_id || ':%' END),
+            '[]'::jsonb)
+    );
+$$;
@@ -0,0 +1,16 @@
+-- Partial Covering Indexes for Dashboard Queries (Aurelie English App)
+-- Run this in Supabase SQL Editor
+
+-- get_active_error_patterns / get_due_items / get_start_dashboard filtern immer auf
+-- denselben Status. Partielle Indizes enthalten nur diese Zeilen (bleiben winzig),
+-- INCLUDE liefert die abgefragten Spalten mit -> Index-Only-Scan ohne Tabellenzugriff.
+
+-- Aktive Fehlermuster: WHERE status = 'AKTIV' -> pattern, verb
+CREATE INDEX IF NOT EXISTS idx_error_patterns_active
+    ON error_patterns(status) INCLUDE (pattern, verb)
+    WHERE status = 'AKTIV';
+
+-- Fällige SR-Items: WHERE status = 'active' AND next_review <= heute -> item, topic
+CREATE INDEX IF NOT EXISTS idx_spaced_repetition_due
+    ON spaced_repetition(next_review) INCLUDE (item, topic)
+    WHERE status = 'active';
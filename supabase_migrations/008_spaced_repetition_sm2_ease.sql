@@ -0,0 +1,20 @@
+-- SM-2 Ease Factor for Spaced Repetition (Aurelie English App)
+-- Run this in Supabase SQL Editor
+
+-- update_spaced_repetition rechnet jetzt mit dem echten SM-2 Algorithmus:
+-- pro Item ein Ease-Factor (wie leicht fällt es) und die Anzahl erfolgreicher Wiederholungen in Folge.
+ALTER TABLE spaced_repetition ADD COLUMN IF NOT EXISTS ease_factor REAL DEFAULT 2.5;
+ALTER TABLE spaced_repetition ADD COLUMN IF NOT EXISTS reps INTEGER DEFAULT 0;
+
+-- Bestehende Items: Wiederholungen aus der alten Intervall-Stufe (1 → 3 → 7 → 14 → 30 → 60) ableiten,
+-- damit fortgeschrittene Items nicht wieder bei 1 Tag anfangen
+UPDATE spaced_repetition
+SET reps = CASE
+        WHEN interval_days >= 60 THEN 6
+        WHEN interval_days >= 30 THEN 5
+        WHEN interval_days >= 14 THEN 4
+        WHEN interval_days >= 7 THEN 3
+        WHEN interval_days >= 3 THEN 2
+        ELSE 1
+    END
+WHERE reps = 0;